@@ -15,9 +15,6 @@ CREATE TABLE accounts (
     profile_picture VARCHAR(255),
     secret_key VARCHAR(255),
     country VARCHAR(100),
-    day INTEGER,
-    month INTEGER,
-    year INTEGER,
     user_verified BOOLEAN DEFAULT FALSE,
     security_pin VARCHAR(8),
     tfa VARCHAR(1) DEFAULT 'F',
@@ -27,7 +24,9 @@ CREATE TABLE accounts (
     auth_token TEXT,
     ttmp TIMESTAMP WITHOUT TIME ZONE,
     CONSTRAINT accounts_email_key UNIQUE (email),
-    CONSTRAINT accounts_username_key UNIQUE (username),
+    -- Covers the login lookup so it can be answered by an index-only scan
+    CONSTRAINT accounts_username_key UNIQUE (username)
+        INCLUDE (id, email, password, first_name, last_name, user_verified, tfa),
     CONSTRAINT idx_security_pin UNIQUE (security_pin) WHERE pin_deleted_at IS NULL
 );
 
@@ -85,6 +84,9 @@ CREATE TABLE followers (
 CREATE SEQUENCE followers_id_seq OWNED BY followers.id;
 ALTER TABLE followers ALTER COLUMN id SET DEFAULT nextval('followers_id_seq');
 
+-- Create index for follower lists (the unique key only covers follower_id-first lookups)
+CREATE INDEX idx_followers_following_id ON followers (following_id);
+
 -- Create likes table
 CREATE TABLE likes (
     id INTEGER NOT NULL PRIMARY KEY,
@@ -122,6 +124,12 @@ CREATE TABLE posts (
 CREATE SEQUENCE posts_id_seq OWNED BY posts.id;
 ALTER TABLE posts ALTER COLUMN id SET DEFAULT nextval('posts_id_seq');
 
+-- Create index for per-user post listings
+CREATE INDEX idx_posts_user_id_created_at ON posts (user_id, created_at DESC);
+
+-- Create index for profile post pages (keyset pagination on last activity)
+CREATE INDEX idx_posts_user_activity ON posts (user_id, COALESCE(edited_at, created_at) DESC, id DESC);
+
 -- Create tokens table
 CREATE TABLE tokens (
     id INTEGER NOT NULL PRIMARY KEY,
@@ -134,6 +142,7 @@ CREATE TABLE tokens (
     verification_token_expiration TIMESTAMP WITHOUT TIME ZONE,
     reset_password_token VARCHAR(255),
     reset_password_token_expiration TIMESTAMP WITHOUT TIME ZONE,
+    CONSTRAINT tokens_account_id_key UNIQUE (account_id),
     CONSTRAINT tokens_account_id_fkey FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
 );
 
@@ -143,6 +152,8 @@ ALTER TABLE tokens ALTER COLUMN id SET DEFAULT nextval('tokens_id_seq');
 
 -- Create index for tokens table
 CREATE INDEX idx_reset_password_token ON tokens (reset_password_token);
+CREATE UNIQUE INDEX idx_verification_token ON tokens (verification_token)
+    INCLUDE (account_id, email, verification_sent_time);
 
 -- Create reset_tokens table
 CREATE TABLE reset_tokens (
@@ -154,6 +165,7 @@ CREATE TABLE reset_tokens (
     reset_password_token_expiration TIMESTAMP WITHOUT TIME ZONE NOT NULL,
     created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     command_output TEXT,
+    CONSTRAINT reset_tokens_account_id_key UNIQUE (account_id),
     CONSTRAINT reset_tokens_account_id_fkey FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
 );
 
@@ -0,0 +1,47 @@
+-- Upgrade an existing insipirahub database to the current database_schema.sql.
+-- Fresh installs only need database_schema.sql. Run this once, before deploying
+-- the matching main.py; every statement is safe to re-run:
+--   psql -d insipirahub -v ON_ERROR_STOP=1 -f database_upgrade.sql
+
+\c insipirahub
+
+BEGIN;
+
+-- Login lookup covered by the username key (index-only scan)
+ALTER TABLE accounts DROP CONSTRAINT IF EXISTS accounts_username_key;
+ALTER TABLE accounts ADD CONSTRAINT accounts_username_key UNIQUE (username)
+    INCLUDE (id, email, password, first_name, last_name, user_verified, tfa);
+
+-- registration_date is the only registration timestamp now
+ALTER TABLE accounts DROP COLUMN IF EXISTS day;
+ALTER TABLE accounts DROP COLUMN IF EXISTS month;
+ALTER TABLE accounts DROP COLUMN IF EXISTS year;
+
+-- Follower lists and profile post pages
+CREATE INDEX IF NOT EXISTS idx_followers_following_id ON followers (following_id);
+CREATE INDEX IF NOT EXISTS idx_posts_user_id_created_at ON posts (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_user_activity ON posts (user_id, COALESCE(edited_at, created_at) DESC, id DESC);
+
+-- Verification link lookup
+CREATE UNIQUE INDEX IF NOT EXISTS idx_verification_token ON tokens (verification_token)
+    INCLUDE (account_id, email, verification_sent_time);
+
+-- One token row per account, required by the ON CONFLICT (account_id) upserts.
+-- Keep the newest row for each account before adding the constraints.
+DELETE FROM tokens t USING tokens newer
+    WHERE t.account_id = newer.account_id AND t.id < newer.id;
+DELETE FROM reset_tokens t USING reset_tokens newer
+    WHERE t.account_id = newer.account_id AND t.id < newer.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'tokens_account_id_key') THEN
+        ALTER TABLE tokens ADD CONSTRAINT tokens_account_id_key UNIQUE (account_id);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'reset_tokens_account_id_key') THEN
+        ALTER TABLE reset_tokens ADD CONSTRAINT reset_tokens_account_id_key UNIQUE (account_id);
+    END IF;
+END
+$$;
+
+COMMIT;
@@ -1,64 +1,187 @@
+import gzip
+import hashlib
+import json
 import logging
-from flask import render_template
+import os
+import re
+import threading
+from flask import request, send_file, url_for
+from jinja2 import Environment, FileSystemLoader
+from werkzeug.exceptions import HTTPException
+
+logger = logging.getLogger(__name__)
+
+ERROR_TEMPLATE = "generic.html"
+
+# Status code -> (title, message) for the shared error page.
+ERROR_META = {
+    400: ("Bad Request", "Your browser sent a request that the server could not understand."),
+    401: ("Unauthorized", "You must be logged in to access this resource."),
+    403: ("Forbidden", "Sorry, you don't have permission to access this resource."),
+    404: ("Not Found", "The page you are looking for could not be found."),
+    405: ("Method Not Allowed", "The method specified in the request is not allowed for the resource identified by the request URI."),
+    412: ("Precondition Failed", "The server does not meet one of the preconditions specified in the request headers."),
+    413: ("Request Entity Too Large", "The request you made is too large to be processed by the server."),
+    415: ("Unsupported Media Type", "The server does not support the media type transmitted in the request."),
+    418: ("I'm a teapot", "The server refuses to brew coffee because it is, permanently, a teapot."),
+    429: ("Too Many Requests", "You have sent too many requests in a given amount of time. Please wait and try again later."),
+    451: ("Unavailable For Legal Reasons", "The server is denying access to the resource as a consequence of a legal demand."),
+    500: ("Internal Server Error", "Something went wrong on the server. We apologize for the inconvenience."),
+    501: ("Not Implemented", "The server does not support the functionality required to fulfill the request."),
+    502: ("Bad Gateway", "The server, while acting as a gateway or proxy, received an invalid response from the upstream server."),
+    503: ("Service Unavailable", "The server is currently unable to handle the request due to temporary overloading or maintenance of the server."),
+    504: ("Gateway Timeout", "The server, while acting as a gateway or proxy, did not receive a timely response from the upstream server."),
+}
+
+# 429 hits are only counted on the request path; the first hit arms a timer
+# that logs one aggregate warning per interval.
+RATE_LIMIT_LOG_INTERVAL = 1.0
+_rate_limit_hits = 0
+_rate_limit_hits_lock = threading.Lock()
+_rate_limit_flush_armed = threading.Lock()
+
+# Whitespace between tags; the error pages have no <pre> or inline-element
+# runs where it would be significant.
+INTER_TAG_WHITESPACE = re.compile(r">\s+<")
+
+# Errors tied to the URL itself can be cached by clients and proxies; the
+# rest still carry an ETag but must be revalidated on every hit.
+CACHEABLE_CODES = frozenset({404, 405, 451, 501})
+
+
+def _minify_html(html):
+    return INTER_TAG_WHITESPACE.sub("><", html).strip()
+
+
+def _build_variant(body, code, content_type="text/html; charset=utf-8", content_encoding=None):
+    etag = hashlib.sha1(body).hexdigest()
+    headers = [
+        ("ETag", f'"{etag}"'),
+        ("Cache-Control", "public, max-age=3600" if code in CACHEABLE_CODES else "no-cache"),
+        ("Vary", "Accept, Accept-Encoding"),
+    ]
+    not_modified_headers = tuple(headers)
+    if content_encoding:
+        headers.append(("Content-Encoding", content_encoding))
+    headers.append(("Content-Type", content_type))
+    headers = tuple(headers)
+    return {
+        "body": body,
+        "etag": etag,
+        "headers": headers,
+        "response": (body, code, headers),
+        "not_modified": (b"", 304, not_modified_headers),
+        "path": None,
+    }
+
+
+def _build_page(body, code, title):
+    json_body = json.dumps({"error": title, "status": code}).encode("utf-8")
+    return {
+        "code": code,
+        "identity": _build_variant(body, code),
+        "gzip": _build_variant(gzip.compress(body, compresslevel=9), code, content_encoding="gzip"),
+        "json": _build_variant(json_body, code, content_type="application/json"),
+    }
+
+
+def _error_response(page):
+    # Return prebuilt (body, status, headers) tuples rather than a shared
+    # Response: Flask builds a fresh Response from them, which after-request
+    # processing (e.g. the session cookie refresh) is free to mutate.
+    if request.accept_mimetypes.best == "application/json":
+        variant = page["json"]
+    elif "gzip" in request.headers.get("Accept-Encoding", ""):
+        variant = page["gzip"]
+    else:
+        variant = page["identity"]
+    if request.if_none_match.contains_weak(variant["etag"]):
+        return variant["not_modified"]
+    if variant["path"]:
+        # With USE_X_SENDFILE the front-end server streams the file itself.
+        response = send_file(variant["path"], mimetype="text/html", etag=False, conditional=False)
+        response.status_code = page["code"]
+        response.headers.update(variant["headers"])
+        return response
+    return variant["response"]
+
+
+def _write_error_files(pages, directory):
+    os.makedirs(directory, exist_ok=True)
+    for code, page in pages.items():
+        for name, variant in (("html", page["identity"]), ("html.gz", page["gzip"])):
+            path = os.path.join(directory, f"{code}.{name}")
+            # Write-then-rename so another worker never sends a partial file.
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(variant["body"])
+            os.replace(tmp_path, path)
+            variant["path"] = path
+
+
+def _count_rate_limit_hit():
+    global _rate_limit_hits
+    with _rate_limit_hits_lock:
+        _rate_limit_hits += 1
+    if _rate_limit_flush_armed.acquire(blocking=False):
+        timer = threading.Timer(RATE_LIMIT_LOG_INTERVAL, _flush_rate_limit_hits)
+        timer.daemon = True
+        timer.start()
+
+
+def _flush_rate_limit_hits():
+    global _rate_limit_hits
+    # Read and reset under the lock so no hit lands between the two.
+    with _rate_limit_hits_lock:
+        count, _rate_limit_hits = _rate_limit_hits, 0
+    _rate_limit_flush_armed.release()
+    if count:
+        logger.warning("Rate limit exceeded %d times in the last %.0fs", count, RATE_LIMIT_LOG_INTERVAL)
+
+
+def _create_error_environment(app):
+    # The error page interpolates no user data, so it gets its own
+    # environment without autoescaping or reload checks.
+    error_env = Environment(
+        loader=FileSystemLoader(os.path.join(app.root_path, app.template_folder, "errors")),
+        autoescape=False,
+        auto_reload=False,
+        cache_size=8,
+        bytecode_cache=app.jinja_env.bytecode_cache,
+    )
+    error_env.globals["url_for"] = url_for
+    return error_env
+
 
 def register_error_handlers(app):
-    @app.errorhandler(400)
-    def bad_request(error):
-        return render_template("errors/client/bad_request_400.html"), 400
-
-    @app.errorhandler(401)
-    def unauthorized(error):
-        return render_template("errors/client/unauthorized_401.html"), 401
-
-    @app.errorhandler(403)
-    def forbidden(error):
-        return render_template("errors/client/forbidden_403.html"), 403
-
-    @app.errorhandler(404)
-    def page_not_found(error):
-        return render_template("errors/client/not_found_404.html"), 404
-
-    @app.errorhandler(405)
-    def method_not_allowed(error):
-        return render_template("errors/client/method_not_allowed_405.html"), 405
-
-    @app.errorhandler(412)
-    def precondition_failed(error):
-        return render_template("errors/client/precondition_failed_412.html"), 412
-
-    @app.errorhandler(413)
-    def request_entity_too_large(error):
-        return render_template("errors/client/request_entity_too_large_413.html"), 413
-
-    @app.errorhandler(415)
-    def unsupported_media_type(error):
-        return render_template("errors/client/unsupported_media_type_415.html"), 415
-
-    @app.errorhandler(418)
-    def im_a_teapot(error):
-        return render_template("errors/client/im_a_teapot_418.html"), 418
-
-    @app.errorhandler(429)
-    def too_many_requests(error):
-        logging.warning(f"Rate limit exceeded: {error}")
-        return render_template("errors/client/too_many_requests_429.html"), 429
-
-    @app.errorhandler(451)
-    def unavailable_for_legal_reasons(error):
-        return render_template("errors/client/unavailable_for_legal_reasons_451.html"), 451
-
-    @app.errorhandler(500)
-    def internal_server_error(error):
-        return render_template("errors/server/internal_server_error_500.html"), 500
-
-    @app.errorhandler(501)
-    def not_implemented(error):
-        return render_template("errors/server/not_implemented_501.html"), 501
-
-    @app.errorhandler(502)
-    def bad_gateway(error):
-        return render_template("errors/server/bad_gateway_502.html"), 502
-
-    @app.errorhandler(503)
-    def service_unavailable(error):
-        return render_template("errors/server/service_unavailable_503.html"), 503
\ No newline at end of file
+    error_env = _create_error_environment(app)
+
+    # The error pages are static, so render and minify each one at startup and
+    # serve the prebuilt body instead of running Jinja per error. A test
+    # request context is needed for url_for() in the templates.
+    template = error_env.get_template(ERROR_TEMPLATE)
+    with app.test_request_context():
+        pages = {
+            code: _build_page(
+                _minify_html(template.render(code=code, title=title, message=message)).encode("utf-8"), code, title
+            )
+            for code, (title, message) in ERROR_META.items()
+        }
+
+    # Behind a proxy that honours X-Sendfile, hand it files instead of bytes.
+    if app.config.get("USE_X_SENDFILE"):
+        _write_error_files(pages, os.path.join(app.instance_path, "error_pages"))
+
+    def handle_error(error):
+        page = pages.get(error.code)
+        if page is None:
+            # No custom page for this code; use Werkzeug's default response.
+            return error
+        if error.code == 429 and logger.isEnabledFor(logging.WARNING):
+            _count_rate_limit_hit()
+        return _error_response(page)
+
+    # One registration covers every HTTP error. Unhandled exceptions still
+    # arrive here as InternalServerError, so no separate Exception handler
+    # is needed.
+    app.register_error_handler(HTTPException, handle_error)
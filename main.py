@@ -1,33 +1,46 @@
+import atexit
+import base64
+import hashlib
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import math
-import random
 import re
 import smtplib
 import string
-import uuid
-from functools import wraps
+import sys
+import threading
+import time
+import types
+from functools import lru_cache, wraps
 from html import escape
 from math import ceil
 import requests
-from flask import Flask, render_template, request, session, flash, redirect, url_for, g, current_app, jsonify, send_file
+from flask import Flask, render_template, request, session, flash, redirect, url_for, g, current_app, jsonify, send_file, after_this_request
 from flask_mail import Mail, Message
-from psycopg2 import ProgrammingError, OperationalError, DataError, IntegrityError
+from flask_session import Session
 from requests import RequestException
-from werkzeug.security import generate_password_hash, check_password_hash
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from flask_moment import Moment
+from jinja2 import BaseLoader, FileSystemBytecodeCache
 from celery import Celery
+from celery.signals import worker_process_shutdown
 import psycopg2
+import redis
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 import secrets
 import bleach
 from datetime import date, datetime, timedelta, timezone
 from flask import send_from_directory
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from error_handlers import register_error_handlers
 
 logging.getLogger('celery.utils.functional').setLevel(logging.INFO)
@@ -44,13 +57,39 @@ missing_vars = [var for var in required_env_vars if not os.getenv(var)]
 if missing_vars:
     raise EnvironmentError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
+# Validated settings, read from the environment once
+CFG = types.SimpleNamespace(
+    env=os.getenv("FLASK_ENV", "development"),
+    secret_key=os.getenv("FLASK_SECRET_KEY"),
+    base_url=os.getenv("BASE_URL", "http://localhost:5000"),
+    db_name=os.getenv("DB_NAME"),
+    db_user=os.getenv("DB_USER"),
+    db_password=os.getenv("DB_PASSWORD"),
+    db_host=os.getenv("DB_HOST"),
+    db_port=os.getenv("DB_PORT"),
+    db_pool_min=int(os.getenv("DB_POOL_MIN", 2)),
+    db_pool_max=int(os.getenv("DB_POOL_MAX", 20)),
+    mail_server=os.getenv("MAIL_SERVER"),
+    mail_port=int(os.getenv("MAIL_PORT")),
+    mail_use_tls=os.getenv("MAIL_USE_TLS").lower() == "true",
+    mail_use_ssl=os.getenv("MAIL_USE_SSL").lower() == "true",
+    mail_username=os.getenv("MAIL_USERNAME"),
+    mail_password=os.getenv("MAIL_PASSWORD"),
+    mail_default_sender=os.getenv("MAIL_DEFAULT_SENDER"),
+    jinja_cache_dir=os.getenv("JINJA_CACHE_DIR"),
+    celery_broker_url=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
+    celery_result_backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0"),
+    redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/1"),
+    redis_max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 64)),
+)
+
 # Configure logging
 log_dir = 'logs'
 if not os.path.exists(log_dir):
     os.makedirs(log_dir)
 
 logger = logging.getLogger('insipirahub')
-env = os.getenv('FLASK_ENV', 'development')
+env = CFG.env
 log_level = logging.DEBUG if env == 'development' else logging.INFO
 logger.setLevel(log_level)
 
@@ -62,9 +101,10 @@ logging.getLogger('celery.utils.functional').setLevel(logging.INFO)  # Already i
 
 file_handler = RotatingFileHandler(
     os.path.join(log_dir, 'app.log'),
-    maxBytes= 10 * 1024 * 1024,  # 10MB
-    backupCount=5
-)   
+    maxBytes=64 * 1024 * 1024,  # 64MB, so rollovers are rare
+    backupCount=10,
+    delay=True  # open the file on first emit, not in every process that imports this module
+)
 
 file_handler.setLevel(log_level)
 file_formatter = logging.Formatter(
@@ -78,27 +118,50 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.ERROR if env == 'production' else log_level)
 console_handler.setFormatter(file_formatter)
 
-logger.addHandler(file_handler)
-if env != 'production':
-    logger.addHandler(console_handler)
+# Loggers only enqueue records; a background listener thread does the file and
+# console I/O (including rotation) off the request/task thread
+log_handlers = [file_handler] if env == 'production' else [file_handler, console_handler]
+queue_handler = QueueHandler(queue.Queue(-1))
+log_listener = None
+
+
+def start_log_listener():
+    global log_listener
+    queue_handler.queue = queue.Queue(-1)
+    log_listener = QueueListener(queue_handler.queue, *log_handlers, respect_handler_level=True)
+    log_listener.start()
+
+
+start_log_listener()
+atexit.register(lambda: log_listener.stop())
+# Threads do not survive fork, so forked workers (e.g. Celery prefork) start their own listener
+os.register_at_fork(after_in_child=start_log_listener)
+
+logger.addHandler(queue_handler)
 
 # Initialize Flask app
 app = Flask(__name__, static_folder="Uploads", static_url_path="/Uploads")
 app.logger = logger
-app.secret_key = os.getenv("FLASK_SECRET_KEY")
+app.secret_key = CFG.secret_key
 app.config["UPLOAD_FOLDER"] = "Uploads"
 app.config["MAX_CONTENT_LENGTH"] = 1 * 1024 * 1024  # 1MB limit
+app.config["TEMPLATES_AUTO_RELOAD"] = env != "production"  # skip template mtime checks in production
 
 # Load SMTP settings from .env
-app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER")
-app.config["MAIL_PORT"] = int(os.getenv("MAIL_PORT"))
-app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS").lower() == "true"
-app.config["MAIL_USE_SSL"] = os.getenv("MAIL_USE_SSL").lower() == "true"
-app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
-app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
-app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_DEFAULT_SENDER")
+app.config["MAIL_SERVER"] = CFG.mail_server
+app.config["MAIL_PORT"] = CFG.mail_port
+app.config["MAIL_USE_TLS"] = CFG.mail_use_tls
+app.config["MAIL_USE_SSL"] = CFG.mail_use_ssl
+app.config["MAIL_USERNAME"] = CFG.mail_username
+app.config["MAIL_PASSWORD"] = CFG.mail_password
+app.config["MAIL_DEFAULT_SENDER"] = CFG.mail_default_sender
+app.config["MAIL_MAX_EMAILS"] = 100  # reused SMTP sessions reconnect after this many messages
 app.config["MAIL_DEBUG"] = False  # Disable SMTP debug logs
 
+# Cache compiled templates on disk so forked workers load them instead of
+# re-parsing (defaults to a per-user temp directory)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(CFG.jinja_cache_dir)
+
 # Initialize Flask-Mail, Moment, error_handlers
 mail = Mail(app)
 moment = Moment(app)
@@ -106,8 +169,8 @@ register_error_handlers(app)
 
 # Celery configuration
 app.config.update(
-    broker_url=os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
-    result_backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0'),
+    broker_url=CFG.celery_broker_url,
+    result_backend=CFG.celery_result_backend,
     broker_connection_retry_on_startup=True,
     broker_connection_max_retries=5,
     broker_connection_timeout=10
@@ -116,18 +179,45 @@ app.config.update(
 # Initialize Celery
 celery = Celery(app.name, broker=app.config['broker_url'])
 celery.conf.update(app.config)
-logger.debug(f"Celery broker: {app.config['broker_url']}, result_backend: {app.config['result_backend']}")
+logger.debug("Celery broker: %s, result_backend: %s", app.config['broker_url'], app.config['result_backend'])
 
 celery.conf.update(
-    include=['main']  # Only load tasks from main.py
+    include=['main'],  # Only load tasks from main.py
+    # Verification mail is latency-critical (the user is waiting for the link), so it
+    # gets its own queue and a higher rate limit than bulk welcome mail. TFA codes
+    # block a login in progress and get a queue of their own.
+    # Run one worker pool per workload so bulk mail never queues ahead of login codes:
+    #   celery -A main.celery worker -Q tfa_email,verify --concurrency=16 --prefetch-multiplier=1
+    #   celery -A main.celery worker -Q bulk,celery --concurrency=4 -O fair
+    # Resend-verification and password-reset mail waits almost entirely on SMTP and
+    # Postgres, so it runs on a gevent pool (Celery applies the monkey patching itself;
+    # DB_POOL_MAX must cover the concurrency). Setting a reset password hashes it with
+    # PBKDF2, which would stall the event loop, so that task keeps a prefork pool and
+    # hands the confirmation mail back to the emails queue:
+    #   DB_POOL_MAX=200 celery -A main.celery worker -Q emails -P gevent -c 200 --prefetch-multiplier=1
+    #   celery -A main.celery worker -Q reset-crypto -P prefork --prefetch-multiplier=1
+    task_routes={
+        'main.send_tfa_token_email_task': {'queue': 'tfa_email'},
+        'main.process_registration_emails': {'queue': 'verify'},
+        'main.send_security_pin_email': {'queue': 'verify'},
+        'main.send_welcome_email': {'queue': 'bulk'},
+        'main.send_welcome': {'queue': 'bulk'},
+        'main.process_resend_verification_email': {'queue': 'emails'},
+        'main.process_reset_password_emails': {'queue': 'emails'},
+        'main.process_reset_password_success': {'queue': 'reset-crypto'},
+        'main.send_reset_password_success_email': {'queue': 'emails'},
+    },
+    # Late-acked tasks are redelivered if a worker dies mid-send; each worker holds
+    # only the task it is running, and failed tasks are still acked (they retry)
+    worker_prefetch_multiplier=1,
+    task_acks_on_failure_or_timeout=True,
+    broker_transport_options={'visibility_timeout': 3600},
 )
 
 # Configure Celery logger to use the same handlers as Flask app
 celery_logger = logging.getLogger('celery')
 celery_logger.setLevel(log_level)
-celery_logger.addHandler(file_handler)
-if env != 'production':
-    celery_logger.addHandler(console_handler)
+celery_logger.addHandler(queue_handler)
 
 # Constants
 MIN_LENGTH = 2
@@ -138,70 +228,462 @@ UPLOAD_FOLDER = "Uploads"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 
-NAME_REGEX = r'^[a-zA-Z]{2,100}$'
-EMAIL_REGEX = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+NAME_REGEX = re.compile(r'^[a-zA-Z]{2,100}$', re.ASCII)
+EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$', re.ASCII)
+REGISTER_EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+USERNAME_REGEX = re.compile(r'^[a-zA-Z][a-zA-Z0-9_]*$')
+PROFILE_EMAIL_REGEX = re.compile(r'^[\w.-]+@[\w.-]+\.\w+$')
+
+# Password strength rules shared by register() and is_strong_password()
+PASSWORD_MIN_LENGTH = 12
+PASSWORD_MIN_SPECIALS = 2
+PASSWORD_SPECIALS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+
+def validate_password(password):
+    """Check password strength in a single pass; return (ok, error_message)."""
+    if len(password) < PASSWORD_MIN_LENGTH:
+        return False, f"Password must be at least {PASSWORD_MIN_LENGTH} characters long."
+
+    has_upper = has_lower = has_digit = repeated = False
+    special_count = 0
+    prev, run_len = None, 0
+    for ch in password:
+        if "A" <= ch <= "Z":
+            has_upper = True
+        elif "a" <= ch <= "z":
+            has_lower = True
+        elif "0" <= ch <= "9":
+            has_digit = True
+        elif ch in PASSWORD_SPECIALS:
+            special_count += 1
+
+        run_len = run_len + 1 if ch == prev else 1
+        prev = ch
+        if run_len >= 3:
+            repeated = True
+            # Every other rule is already settled, so the outcome cannot change
+            if has_upper and has_lower and has_digit and special_count >= PASSWORD_MIN_SPECIALS:
+                break
+
+    if not has_upper:
+        return False, "Password must contain at least one uppercase letter."
+    if not has_lower:
+        return False, "Password must contain at least one lowercase letter."
+    if not has_digit:
+        return False, "Password must contain at least one digit."
+    if special_count < PASSWORD_MIN_SPECIALS:
+        return False, "Password must contain at least two special characters (e.g., !@#$%)."
+    if repeated:
+        return False, "Password must not contain repetitive characters (e.g., aaa, 111)."
+    return True, None
+
+
+# New hashes use Werkzeug's PBKDF2 cost; stored hashes carry their own method
+# string, so check_password_hash keeps verifying older ones
+PASSWORD_HASH_ITERATIONS = DEFAULT_PBKDF2_ITERATIONS
+PASSWORD_HASH_METHOD = f"pbkdf2:sha256:{PASSWORD_HASH_ITERATIONS}"
+
+
+def needs_rehash(password_hash):
+    # Only PBKDF2 hashes made with fewer iterations than the current cost are
+    # upgraded; stronger or different hashes are left alone, so a login never
+    # lowers a stored cost
+    method = password_hash.split("$", 1)[0].split(":")
+    if method[0] != "pbkdf2" or len(method) != 3:
+        return False
+    try:
+        return int(method[2]) < PASSWORD_HASH_ITERATIONS
+    except ValueError:
+        return False
+
+
+def running_under_gevent():
+    if "gevent.monkey" not in sys.modules:
+        return False
+    from gevent import monkey
+
+    return monkey.is_module_patched("socket")
+
+
+# PBKDF2 hashing and checks run off the request worker so one never holds it (or,
+# under gevent, its whole event loop). hashlib's PBKDF2 releases the GIL, so plain
+# threads hash on every core; under gevent they go to the hub's pool of real OS
+# threads instead, since this pool's threads would be greenlets there.
+password_hash_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash")
+
+
+def run_password_hash(func, *args, **kwargs):
+    if running_under_gevent():
+        from gevent import get_hub
+
+        return get_hub().threadpool.apply(func, args, kwargs)
+    return password_hash_pool.submit(func, *args, **kwargs).result()
+
+
+def hash_password(password):
+    return run_password_hash(generate_password_hash, password, method=PASSWORD_HASH_METHOD, salt_length=8)
+
+
+def verify_password(password_hash, password):
+    return run_password_hash(check_password_hash, password_hash, password)
+
+
+# Keep-alive session for reCAPTCHA checks so each login/registration reuses a
+# pooled TLS connection instead of opening a new one
+RECAPTCHA_VERIFY_URL = "https://www.google.com/recaptcha/api/siteverify"
+RECAPTCHA_TIMEOUT = (1.0, 2.0)  # (connect, read) seconds
+# A passed check is remembered in Redis under the hash of its response token for
+# this long, so the same form resubmitted after a validation error does not go
+# back to Google (which rejects a token it has already seen). The entry is claimed
+# atomically on use, put back only if that submission did not register an account.
+RECAPTCHA_REUSE_SECONDS = 120
+
+
+def recaptcha_cache_key(recaptcha_response):
+    return f"recap:{hashlib.sha256(recaptcha_response.encode()).hexdigest()}"
+
+
+recaptcha_session = requests.Session()
+recaptcha_session.mount(
+    "https://",
+    HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=Retry(total=2, backoff_factor=0.1)),
+)
+recaptcha_executor = ThreadPoolExecutor(max_workers=20, thread_name_prefix="recaptcha")
+
+
+def verify_recaptcha(recaptcha_data):
+    return recaptcha_session.post(RECAPTCHA_VERIFY_URL, data=recaptcha_data, timeout=RECAPTCHA_TIMEOUT).json()
+
 
 # Allowed HTML tags and attributes for sanitization
-ALLOWED_TAGS = bleach.sanitizer.ALLOWED_TAGS | {'p', 'div', 'h1', 'h2', 'strong', 'em', 'br', 'table', 'tr', 'td'}
+ALLOWED_TAGS = frozenset(bleach.sanitizer.ALLOWED_TAGS) | frozenset({'p', 'div', 'h1', 'h2', 'strong', 'em', 'br', 'table', 'tr', 'td'})
 ALLOWED_ATTRIBUTES = {'a': ['href'], 'table': ['style'], 'td': ['style'], 'div': ['style']}
 
+# bleach Cleaners hold parser state and are not thread-safe, so keep one per
+# thread and reuse it instead of building a new one in every bleach.clean()
+_cleaners = threading.local()
+
+
+def strip_html(value):
+    """Strip all HTML tags from value using the thread's cached Cleaner."""
+    if not value:
+        return ""
+    cleaner = getattr(_cleaners, "strip", None)
+    if cleaner is None:
+        cleaner = _cleaners.strip = bleach.sanitizer.Cleaner(tags=[], strip=True)
+    return cleaner.clean(value)
+
+
+def clean_name(value):
+    """Title-case a name, skipping bleach when it already matches NAME_REGEX."""
+    if NAME_REGEX.match(value):
+        return value.title()
+    return strip_html(value.title())
+
+
+# Email HTML is minified once when the template source is loaded, not per render;
+# the emails contain no <pre>/<textarea>, so collapsing whitespace is safe
+WHITESPACE_RUN = re.compile(r"\s+")
+
+
+class MinifyingLoader(BaseLoader):
+    def __init__(self, loader):
+        self.loader = loader
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = self.loader.get_source(environment, template)
+        return WHITESPACE_RUN.sub(" ", source).strip(), filename, uptodate
+
+
+email_jinja_env = app.jinja_env.overlay(loader=MinifyingLoader(app.jinja_loader))
+
+# HTML email bodies are compiled once at import and only rendered per message
+VERIFICATION_EMAIL_TEMPLATE = email_jinja_env.get_template("emails/verification.html")
+SECURITY_PIN_EMAIL_TEMPLATE = email_jinja_env.get_template("emails/security_pin.html")
+WELCOME_EMAIL_TEMPLATE = email_jinja_env.get_template("emails/welcome.html")
+
+# The TFA mail's links and addresses never change, so they are bound to the
+# template once and each send only renders the username and token
+TFA_EMAIL_SERVER_ADDRESS = "http://localhost:5000"
+TFA_EMAIL_SUPPORT_ADDRESS = "intuitivers@gmail.com"
+TFA_EMAIL_SENDER = "intuitivers@gmail.com"
+TFA_TOKEN_EMAIL_TEMPLATE = email_jinja_env.get_template(
+    "emails/tfa_token.html",
+    globals={
+        "server_address": TFA_EMAIL_SERVER_ADDRESS,
+        "support_email": TFA_EMAIL_SUPPORT_ADDRESS,
+        "password_reset_link": f"{TFA_EMAIL_SERVER_ADDRESS}/reset_password",
+    },
+)
+
+# Resend-verification and password-reset mail, compiled once like the bodies above
+RESEND_VERIFICATION_EMAIL_TEMPLATE = email_jinja_env.get_template("emails/resend_verification.html")
+RESET_PASSWORD_EMAIL_TEMPLATE = email_jinja_env.get_template("emails/reset_password.html")
+RESET_PASSWORD_SUCCESS_EMAIL_TEMPLATE = email_jinja_env.get_template("emails/reset_password_success.html")
+
+# Plain-text parts keep their line breaks, so they skip the minifying loader
+RESEND_VERIFICATION_EMAIL_TEXT = app.jinja_env.get_template("emails/resend_verification.txt")
+RESET_PASSWORD_EMAIL_TEXT = app.jinja_env.get_template("emails/reset_password.txt")
+RESET_PASSWORD_SUCCESS_EMAIL_TEXT = app.jinja_env.get_template("emails/reset_password_success.txt")
+
+
+@lru_cache(maxsize=256)
+def render_verification_email_html(username, email, verification_link, support_email, server_address):
+    # Cached so a retried process_registration_emails task reuses the body
+    return VERIFICATION_EMAIL_TEMPLATE.render(
+        username=username,
+        email=email,
+        verification_link=verification_link,
+        support_email=support_email,
+        server_address=server_address,
+    )
+
 # Session configuration
 app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(minutes=15)  # session lifetime to 15 minutes
-app.config["SESSION_COOKIE_SECURE"] = os.getenv("FLASK_ENV") == "production"  # secure cookies in production
+app.config["SESSION_COOKIE_SECURE"] = CFG.env == "production"  # secure cookies in production
 app.config["SESSION_COOKIE_HTTPONLY"] = True  # Prevent JavaScript access to cookies
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"  # CSRF protection
 
+# Server-side sessions: the cookie only carries a random session id, the data
+# lives in Redis, so responses no longer re-sign and re-send the whole session
+redis_client = redis.Redis(
+    connection_pool=redis.BlockingConnectionPool.from_url(
+        CFG.redis_url, max_connections=CFG.redis_max_connections, socket_keepalive=True
+    )
+)
+app.config["SESSION_TYPE"] = "redis"
+app.config["SESSION_REDIS"] = redis_client
+app.config["SESSION_PERMANENT"] = False  # only sessions marked permanent (after TFA) get the 15 minute lifetime
+Session(app)
+
+# The edit-profile form row is cached for a few minutes; every write to the
+# account's name or email, and account deletion, drops it
+PROFILE_CACHE_SECONDS = 300
+
+
+def profile_cache_key(user_id):
+    return f"user:{user_id}"
+
+
+def drop_cached(*keys):
+    # Runs after the database commit: a Redis outage only leaves entries to expire
+    # on their TTL, it must not fail a request whose write already went through
+    try:
+        redis_client.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning("Could not drop cache keys %s: %s", keys, e)
 
 
 # Database connection functions
+# The pool is created lazily so every process (web worker, Celery prefork child)
+# opens its own connections instead of sharing sockets inherited across fork
+db_pool = None
+db_pool_lock = threading.Lock()
+
+# Under a gevent worker (celery -P gevent) psycopg2 has to wait on its sockets
+# through the gevent hub, otherwise every query blocks all greenlets in the process
+if running_under_gevent():
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
+
+# Hot single-row lookups are prepared once per physical connection so repeated
+# calls skip Postgres' parse/plan step; run them with execute_prepared()
+PREPARED_STATEMENTS = {
+    "login_account_by_username": (
+        "SELECT id, username, email, password, first_name, last_name, user_verified, tfa "
+        "FROM accounts WHERE username = $1"
+    ),
+    "account_by_username": (
+        "SELECT id, username, email, password, role, tfa, user_verified FROM accounts WHERE username = $1"
+    ),
+    "tfa_token_by_id": "SELECT auth_token, ttmp FROM accounts WHERE id = $1",
+    "tfa_flag_by_id": "SELECT tfa FROM accounts WHERE id = $1",
+    "account_by_email": "SELECT id, username, email, user_verified FROM accounts WHERE email = $1",
+    "profile_form_by_id": "SELECT id, email, first_name, last_name FROM accounts WHERE id = $1",
+    "upsert_verification_token": (
+        "INSERT INTO tokens (account_id, username, email, verification_token, "
+        "verification_sent_time, verification_token_expiration) VALUES ($1, $2, $3, $4, $5, $6) "
+        "ON CONFLICT (account_id) DO UPDATE SET verification_token = EXCLUDED.verification_token, "
+        "verification_sent_time = EXCLUDED.verification_sent_time, "
+        "verification_token_expiration = EXCLUDED.verification_token_expiration"
+    ),
+}
+
+
+# The same statements with psycopg2 placeholders, used on a connection where
+# preparing a statement failed
+UNPREPARED_STATEMENTS = {
+    name: re.sub(r"\$\d+", "%s", query) for name, query in PREPARED_STATEMENTS.items()
+}
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    statements_prepared = False
+    prepared_statement_names = frozenset()
+
+
+def prepare_statements(connection):
+    # Each PREPARE runs on its own, so one failing statement (e.g. a schema that is
+    # behind the code) is logged and falls back to plain execution instead of
+    # failing every request on this connection
+    prepared = set()
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            for name, query in PREPARED_STATEMENTS.items():
+                try:
+                    cursor.execute(f"PREPARE {name} AS {query}")
+                except psycopg2.Error as e:
+                    logger.error("Could not prepare statement %s, running it unprepared: %s", name, e)
+                else:
+                    prepared.add(name)
+    finally:
+        connection.autocommit = False
+    connection.prepared_statement_names = frozenset(prepared)
+    connection.statements_prepared = True
+
+
+def execute_prepared(cursor, name, params):
+    if name in cursor.connection.prepared_statement_names:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cursor.execute(UNPREPARED_STATEMENTS[name], params)
+
+
+def get_db_pool():
+    global db_pool
+    if db_pool is None:
+        with db_pool_lock:
+            if db_pool is None:
+                db_pool = ThreadedConnectionPool(
+                    minconn=CFG.db_pool_min,
+                    maxconn=CFG.db_pool_max,
+                    database=CFG.db_name,
+                    user=CFG.db_user,
+                    password=CFG.db_password,
+                    host=CFG.db_host,
+                    port=CFG.db_port,
+                    connection_factory=PreparedConnection,
+                )
+    return db_pool
+
+
 def get_db_connection():
     db_connection = getattr(g, "_db_connection", None)
     if db_connection is None:
-        db_connection = g._db_connection = psycopg2.connect(
-            database=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-        )
+        db_connection = g._db_connection = get_db_pool().getconn()
+        if not db_connection.statements_prepared:
+            prepare_statements(db_connection)
     return db_connection
 
 @app.teardown_appcontext
 def close_db_connection(exception=None):
-    db_connection = getattr(g, "_db_connection", None)
+    db_connection = g.pop("_db_connection", None)
     if db_connection is not None:
-        db_connection.close()
+        # Hand the connection back in its default state; putconn() rolls back
+        # any open transaction and discards connections that were closed
+        if not db_connection.closed and db_connection.autocommit:
+            db_connection.autocommit = False
+        get_db_pool().putconn(db_connection)
 
 
-@celery.task(bind=True, max_retries=3, rate_limit="100/h")
-def process_registration_emails(self, account_id, email, username, first_name, last_name, country, verification_token, security_pin):
+# Email sending
+# Open SMTP sessions are kept in a shared pool and reused across tasks instead of
+# paying connect + STARTTLS + AUTH for every message. A pool rather than one
+# session per thread, because a gevent worker runs every task in a new greenlet.
+# Flask-Mail recycles a session every MAIL_MAX_EMAILS messages; sessions older
+# than SMTP_CONNECTION_MAX_AGE are closed instead of being reused.
+SMTP_CONNECTION_MAX_AGE = 300
+SMTP_POOL_SIZE = 16
+smtp_pool = queue.LifoQueue(maxsize=SMTP_POOL_SIZE)
+
+
+def open_smtp_connection():
+    connection = mail.connect()
+    connection.__enter__()  # opens the session; closed by close_smtp_connection()
+    connection.opened_at = time.monotonic()
+    return connection
+
+
+def close_smtp_connection(connection):
+    if connection.host is not None:
+        try:
+            connection.host.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+
+def checkout_smtp_connection():
+    while True:
+        try:
+            connection = smtp_pool.get_nowait()
+        except queue.Empty:
+            return open_smtp_connection()
+        if time.monotonic() - connection.opened_at <= SMTP_CONNECTION_MAX_AGE:
+            return connection
+        close_smtp_connection(connection)
+
+
+def release_smtp_connection(connection):
+    try:
+        smtp_pool.put_nowait(connection)
+    except queue.Full:
+        close_smtp_connection(connection)
+
+
+def send_email(msg):
+    connection = checkout_smtp_connection()
+    try:
+        try:
+            connection.send(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle session; reconnect once and resend
+            close_smtp_connection(connection)
+            connection = open_smtp_connection()
+            connection.send(msg)
+    except Exception:
+        # The session is in an unknown state after a failed send; don't pool it
+        close_smtp_connection(connection)
+        raise
+    release_smtp_connection(connection)
+
+
+@worker_process_shutdown.connect
+def close_smtp_on_shutdown(**kwargs):
+    while True:
+        try:
+            close_smtp_connection(smtp_pool.get_nowait())
+        except queue.Empty:
+            break
+
+
+@celery.task(bind=True, max_retries=3, rate_limit="1000/m")
+def process_registration_emails(self, payload):
+    # payload is sanitized by the caller: account_id, email, username, verification_token
+    account_id = payload["account_id"]
+    sanitized_email = payload["email"]
+    sanitized_username = payload["username"]
+    sanitized_verification_token = payload["verification_token"]
     with app.app_context():
         try:
-            logger.info(f"Starting background task for user: {email}, account_id: {account_id}")
+            logger.info("Starting background task for user: %s, account_id: %s", sanitized_email, account_id)
 
-            # Sanitize inputs
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
-            sanitized_username = bleach.clean(username, tags=[], strip=True)
-            sanitized_first_name = bleach.clean(first_name.title(), tags=[], strip=True)
-            sanitized_last_name = bleach.clean(last_name.title(), tags=[], strip=True)
-            sanitized_country = bleach.clean(country.title(), tags=[], strip=True)
-            sanitized_verification_token = bleach.clean(verification_token, tags=[], strip=True)
-            sanitized_security_pin = bleach.clean(str(security_pin), tags=[], strip=True)
-
-            # Verify account_id exists in accounts table
+            # Insert verification token into tokens table with UTC timestamps, but only
+            # if account_id still exists in accounts table (single round trip)
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("SELECT 1 FROM accounts WHERE id = %s", (account_id,))
-                    if not cursor.fetchone():
-                        logger.error(f"Account ID {account_id} does not exist in accounts table for email: {sanitized_email}")
-                        return  # Exit task gracefully
-
-                    # Insert verification token into tokens table with UTC timestamps
                     verification_sent_time = datetime.now(timezone.utc)
                     verification_token_expiration = verification_sent_time + timedelta(minutes=10)
                     cursor.execute(
                         "INSERT INTO tokens (account_id, username, email, verification_token, verification_sent_time, verification_token_expiration) "
-                        "VALUES (%s, %s, %s, %s, %s, %s)",
+                        "SELECT %s, %s, %s, %s, %s, %s "
+                        "WHERE EXISTS (SELECT 1 FROM accounts WHERE id = %s) "
+                        "ON CONFLICT (account_id) DO UPDATE SET verification_token = EXCLUDED.verification_token, "
+                        "verification_sent_time = EXCLUDED.verification_sent_time, "
+                        "verification_token_expiration = EXCLUDED.verification_token_expiration "
+                        "RETURNING id",
                         (
                             account_id,
                             sanitized_username,
@@ -209,10 +691,14 @@ def process_registration_emails(self, account_id, email, username, first_name, l
                             sanitized_verification_token,
                             verification_sent_time,
                             verification_token_expiration,
+                            account_id,
                         ),
                     )
+                    if cursor.fetchone() is None:
+                        logger.error("Account ID %s does not exist in accounts table for email: %s", account_id, sanitized_email)
+                        return  # Exit task gracefully
                     conn.commit()
-                    logger.info(f"Inserted verification token for account_id: {account_id}")
+                    logger.info("Inserted verification token for account_id: %s", account_id)
 
             server_address = "http://localhost:5000"  # Update to https://inspirahub.com when domain is ready
             support_email = "intuitivers@gmail.com"
@@ -230,49 +716,9 @@ def process_registration_emails(self, account_id, email, username, first_name, l
                 f"Inspirahub Team\n"
                 f"{server_address}"
             )
-            verification_html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Inspirahub Email Verification</title>
-            </head>
-            <body style="font-family: 'Verdana', Arial, sans-serif; color: #333333; background-color: #f5f3ff; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 15px; border: 2px solid #805ad5; overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #805ad5, #6b46c1); color: #ffffff; padding: 30px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 32px; font-weight: 700;">Inspirahub</h1>
-                        <p style="margin: 10px 0 0; font-size: 18px;">Verify Your Email</p>
-                    </div>
-                    <div style="padding: 35px;">
-                        <p style="font-size: 18px; line-height:Exc1.6; margin: 0 0 20px;">Hello {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px;">
-                            Thank you for joining Inspirahub! Please verify your email address: <strong>{sanitized_email}</strong>.
-                        </p>
-                        <div style="text-align: center; margin: 25px 0;">
-                            <a href="{verification_link}" style="display: inline-block; padding: 15px 30px; background-color: #6b46c1; color: #ffffff; text-decoration: none; border-radius: 8px; font-size: 18px; font-weight: 600;">
-                                Verify Email
-                            </a>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px;">
-                            Or copy and paste this link: <a href="{verification_link}" style="color: #6b46c1; text-decoration: none;">{verification_link}</a>
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px;">
-                            This link expires in 10 minutes. If you didn’t sign up, contact us at 
-                            <a href="mailto:{support_email}" style="color: #6b46c1; text-decoration: none;">{support_email}</a>.
-                            Need help? Visit our <a href="{server_address}/help" style="color: #6b46c1; text-decoration: none;">Help Center</a>.
-                        </p>
-                    </div>
-                    <div style="background-color: #e9d8fd; padding: 20px; text-align: center; font-size: 13px; color: #4a5568;">
-                        <p style="margin: 0;">Inspirahub - Connecting Communities</p>
-                        <p style="margin: 8px 0 0;">
-                            <a href="{server_address}" style="color: #6b46c1; text-decoration: none;">Inspirahub</a> | 
-                            <a href="mailto:{support_email}" style="color: #6b46c1; text-decoration: none;">Contact Support</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            verification_html_body = render_verification_email_html(
+                sanitized_username, sanitized_email, verification_link, support_email, server_address
+            )
             verification_msg = Message(
                 verification_subject,
                 recipients=[sanitized_email],
@@ -281,29 +727,29 @@ def process_registration_emails(self, account_id, email, username, first_name, l
             )
             verification_msg.body = verification_plain_body
             verification_msg.html = verification_html_body
-            mail.send(verification_msg)
-            logger.info(f"Sent verification email to: {sanitized_email}")
+            send_email(verification_msg)
+            logger.info("Sent verification email to: %s", sanitized_email)
 
         except psycopg2.Error as e:
-            logger.error(f"Database error in process_registration_emails for {sanitized_email}: {str(e)}", exc_info=True)
+            logger.error("Database error in process_registration_emails for %s: %s", sanitized_email, e, exc_info=True)
             self.retry(countdown=60)
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in process_registration_emails for {sanitized_email}: {str(e)}", exc_info=True)
+            logger.error("SMTP error in process_registration_emails for %s: %s", sanitized_email, e, exc_info=True)
             self.retry(countdown=60)
         except Exception as e:
-            logger.error(f"Unexpected error in process_registration_emails for {sanitized_email}: {str(e)}", exc_info=True)
+            logger.error("Unexpected error in process_registration_emails for %s: %s", sanitized_email, e, exc_info=True)
             self.retry(countdown=60)
 
 
-@celery.task(bind=True, max_retries=3, rate_limit="100/h")
+@celery.task(bind=True, max_retries=3, rate_limit="1000/m")
 def send_security_pin_email(self, account_id, email, username, security_pin):
     with app.app_context():
         try:
-            logger.info(f"Sending security PIN email to: {email}, account_id: {account_id}")
+            logger.info("Sending security PIN email to: %s, account_id: %s", email, account_id)
 
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
-            sanitized_username = bleach.clean(username.title(), tags=[], strip=True)
-            sanitized_security_pin = bleach.clean(str(security_pin), tags=[], strip=True)
+            sanitized_email = strip_html(email)
+            sanitized_username = clean_name(username)
+            sanitized_security_pin = str(security_pin)  # generated from ascii letters and digits
 
             server_address = "http://localhost:5000"
             support_email = "intuitivers@gmail.com"
@@ -318,44 +764,12 @@ def send_security_pin_email(self, account_id, email, username, security_pin):
                 f"Inspirahub Team\n"
                 f"{server_address}"
             )
-            pin_html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Inspirahub Security PIN</title>
-            </head>
-            <body style="font-family: 'Verdana', Arial, sans-serif; color: #333333; background-color: #fff5f5; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 15px; border: 2px solid #c53030; overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #e53e3e, #c53030); color: #ffffff; padding: 30px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 32px; font-weight: 700;">Inspirahub</h1>
-                        <p style="margin: 10px 0 0; font-size: 18px;">Your Security PIN</p>
-                    </div>
-                    <div style="padding: 35px;">
-                        <p style="font-size: 18px; line-height: 1.6; margin: 0 0 20px;">Hello {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px;">
-                            Below is your security PIN for account deletion:
-                        </p>
-                        <div style="text-align: center; margin: 25px 0; padding: 20px; background-color: #fef5f5; border: 2px dashed #c53030; border-radius: 10px;">
-                            <p style="font-size: 24px; font-weight: 700; color: #c53030; margin: 0; font-family: 'Courier New', monospace;">{sanitized_security_pin}</p>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px;">
-                            Keep this PIN safe. If you lose it, contact 
-                            <a href="mailto:{support_email}" style="color: #c53030; text-decoration: none;">{support_email}</a>.
-                            Learn more at our <a href="{server_address}/help" style="color: #c53030; text-decoration: none;">Help Center</a>.
-                        </p>
-                    </div>
-                    <div style="background-color: #fed7d7; padding: 20px; text-align: center; font-size: 13px; color: #4a5568;">
-                        <p style="margin: 0;">Inspirahub - Connecting Communities</p>
-                        <p style="margin: 8px 0 0;">
-                            <a href="{server_address}" style="color: #c53030; text-decoration: none;">Inspirahub</a> | 
-                            <a href="mailto:{support_email}" style="color: #c53030; text-decoration: none;">Contact Support</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            pin_html_body = SECURITY_PIN_EMAIL_TEMPLATE.render(
+                username=sanitized_username,
+                security_pin=sanitized_security_pin,
+                support_email=support_email,
+                server_address=server_address,
+            )
             pin_msg = Message(
                 pin_subject,
                 recipients=[sanitized_email],
@@ -364,26 +778,28 @@ def send_security_pin_email(self, account_id, email, username, security_pin):
             )
             pin_msg.body = pin_plain_body
             pin_msg.html = pin_html_body
-            mail.send(pin_msg)
-            logger.info(f"Sent security PIN email to: {sanitized_email}")
+            send_email(pin_msg)
+            logger.info("Sent security PIN email to: %s", sanitized_email)
 
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in send_security_pin_email for {sanitized_email}: {str(e)}")
+            logger.error("SMTP error in send_security_pin_email for %s: %s", sanitized_email, e)
             self.retry(countdown=60)
         except Exception as e:
-            logger.error(f"Unexpected error in send_security_pin_email for {sanitized_email}: {str(e)}")
+            logger.error("Unexpected error in send_security_pin_email for %s: %s", sanitized_email, e)
             self.retry(countdown=60)
 
 @celery.task(bind=True, max_retries=3, rate_limit="100/h")
-def send_welcome_email(self, account_id, email, username, country, security_pin, user_verified):
+def send_welcome_email(self, payload):
+    # payload is sanitized by the caller: account_id, email, username, country, security_pin, user_verified
+    account_id = payload["account_id"]
+    sanitized_email = payload["email"]
+    sanitized_username = payload["username"]
+    sanitized_country = payload["country"]
+    sanitized_security_pin = payload["security_pin"]
+    user_verified = payload["user_verified"]
     with app.app_context():
         try:
-            logger.info(f"Sending welcome email to: {email}, account_id: {account_id}")
-
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
-            sanitized_username = bleach.clean(username.title(), tags=[], strip=True)
-            sanitized_country = bleach.clean(country.title(), tags=[], strip=True)
-            sanitized_security_pin = bleach.clean(str(security_pin), tags=[], strip=True)
+            logger.info("Sending welcome email to: %s, account_id: %s", sanitized_email, account_id)
 
             server_address = "http://localhost:5000"
             support_email = "intuitivers@gmail.com"
@@ -404,63 +820,15 @@ def send_welcome_email(self, account_id, email, username, country, security_pin,
                 f"Inspirahub Team\n"
                 f"{server_address}"
             )
-            welcome_html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Welcome to Inspirahub</title>
-            </head>
-            <body style="font-family: 'Verdana', Arial, sans-serif; color: #2d3748; background-color: #e6fffa; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 15px; border: 2px solid #38b2ac; overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #38b2ac, #ed64a6); color: #ffffff; padding: 30px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 34px; font-weight: bold;">Welcome to Inspirahub</h1>
-                        <p style="margin: 10px 0 0; font-size: 18px;">Start Your Journey!</p>
-                    </div>
-                    <div style="padding: 30px;">
-                        <p style="font-size: 18px; line-height: 1.6; margin: 0 0 20px;">Hello {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px;">
-                            Thank you for joining Inspirahub! We’re excited to have you in our community.
-                        </p>
-                        <h2 style="font-size: 22px; color: #38b2ac; margin: 25px 0 15px; text-align: center;">Important Information</h2>
-                        <ul style="list-style: none; padding: 0; margin: 0 0 25px;">
-                            <li style="font-size: 16px; line-height: 1.6; margin: 10px 0; padding: 15px; background-color: #f0fff4; border-left: 5px solid #ed64a6; border-radius: 8px;">
-                                <strong>Your Security PIN:</strong> {sanitized_security_pin} (keep this safe for account deletion).
-                            </li>
-                            {"<li style='font-size: 16px; line-height: 1.6; margin: 10px 0; padding: 15px; background-color: #f0fff4; border-left: 5px solid #ed64a6; border-radius: 8px;'><strong>Verify Your Email:</strong> Request a new verification link at <a href='{reverify_link}' style='color: #ed64a6; text-decoration: underline;'>Request Verification</a> if you haven’t verified yet.</li>" if not user_verified else ""}
-                        </ul>
-                        <h2 style="font-size: 22px; color: #38b2ac; margin: 25px 0 15px; text-align: center;">Get Started</h2>
-                        <ul style="list-style: none; padding: 0; margin: 0 0 25px;">
-                            <li style="font-size: 16px; line-height: 1.6; margin: 10px 0; padding: 15px; background-color: #f0fff4; border-left: 5px solid #ed64a6; border-radius: 8px;">
-                                <strong>Update Your Profile:</strong> Add a photo and bio to personalize your account. 
-                                <a href="{server_address}/profile" style="color: #ed64a6; text-decoration: underline;">Edit Profile</a>
-                            </li>
-                            <li style="font-size: 16px; line-height: 1.6; margin: 10px 0; padding: 15px; background-color: #f0fff4; border-left: 5px solid #ed64a6; border-radius: 8px;">
-                                <strong>Explore the Community:</strong> Discover posts and connect with others from {sanitized_country}.
-                            </li>
-                        </ul>
-                        <div style="text-align: center; margin: 25px 0;">
-                            <a href="{server_address}/profile" style="display: inline-block; padding: 15px 30px; background: linear-gradient(90deg, #38b2ac, #ed64a6); color: #ffffff; text-decoration: none; border-radius: 10px; font-size: 18px; font-weight: bold;">
-                                Get Started
-                            </a>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 20px; text-align: center;">
-                            Questions? Visit our <a href="{server_address}/help" style="color: #ed64a6; text-decoration: underline;">Help Center</a> or contact 
-                            <a href="mailto:{support_email}" style="color: #ed64a6; text-decoration: underline;">{support_email}</a>.
-                            To stop receiving these emails, delete your account at <a href="{server_address}/delete" style="color: #ed64a6; text-decoration: underline;">{server_address}/delete</a>.
-                        </p>
-                    </div>
-                    <div style="background-color: #b2f5ea; padding: 20px; text-align: center; font-size: 14px; color: #2d3748;">
-                        <p style="margin: 0; font-size: 16px; font-weight: bold;">Inspirahub - Connecting Communities</p>
-                        <p style="margin: 10px 0 0;">
-                            <a href="{server_address}" style="color: #ed64a6; text-decoration: underline;">Inspirahub</a> | 
-                            <a href="mailto:{support_email}" style="color: #ed64a6; text-decoration: underline;">Contact Support</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            welcome_html_body = WELCOME_EMAIL_TEMPLATE.render(
+                username=sanitized_username,
+                security_pin=sanitized_security_pin,
+                country=sanitized_country,
+                user_verified=user_verified,
+                reverify_link=reverify_link,
+                support_email=support_email,
+                server_address=server_address,
+            )
             welcome_msg = Message(
                 welcome_subject,
                 recipients=[sanitized_email],
@@ -473,19 +841,20 @@ def send_welcome_email(self, account_id, email, username, country, security_pin,
                 "List-Unsubscribe": f"<mailto:{support_email}?subject=unsubscribe>, <{server_address}/unsubscribe>",
                 "Precedence": "bulk"
             }
-            mail.send(welcome_msg)
-            logger.info(f"Sent welcome email to: {sanitized_email}")
+            send_email(welcome_msg)
+            logger.info("Sent welcome email to: %s", sanitized_email)
 
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in send_welcome_email for {sanitized_email}: {str(e)}")
+            logger.error("SMTP error in send_welcome_email for %s: %s", sanitized_email, e)
             self.retry(countdown=60)
         except Exception as e:
-            logger.error(f"Unexpected error in send_welcome_email for {sanitized_email}: {str(e)}")
+            logger.error("Unexpected error in send_welcome_email for %s: %s", sanitized_email, e)
             self.retry(countdown=60)
 
 
-# Helper task for delayed welcome email
-@celery.task(bind=True, max_retries=3)
+# Helper task for delayed welcome email. Unlike the other mail tasks it carries
+# pre-rendered bodies, so its messages are gzipped on the broker
+@celery.task(bind=True, max_retries=3, compression="gzip")
 def send_welcome(self, email, subject, plain_body, html_body, sender_email, reply_to):
     with app.app_context():
         try:
@@ -501,43 +870,61 @@ def send_welcome(self, email, subject, plain_body, html_body, sender_email, repl
                 "List-Unsubscribe": f"<mailto:{reply_to}?subject=unsubscribe>, <https://inspirahub.com/unsubscribe>",
                 "Precedence": "bulk"
             }
-            mail.send(msg)
-            logger.info(f"Sent delayed welcome email to: {email}")
+            send_email(msg)
+            logger.info("Sent delayed welcome email to: %s", email)
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in send_welcome for {email}: {str(e)}")
+            logger.error("SMTP error in send_welcome for %s: %s", email, e)
             self.retry(countdown=60)
 
 
 # Generate a random secret verification token
 def generate_verification_token(length=64):
-    characters = string.ascii_letters + string.digits
-    return "".join(secret.choice(characters) for _ in range(length))
+    # token_urlsafe draws os.urandom once and base64-encodes it in C; it yields
+    # ~1.3 URL-safe chars per byte, so trim to the requested length
+    return secrets.token_urlsafe(length)[:length]
+
+
+PIN_ALPHABET = string.ascii_letters + string.digits  # a-z, A-Z, 0-9
+PIN_LENGTH = 7
+
+
+def generate_pin_candidate():
+    """Draw one uniform random integer and spell it as a base-62 PIN."""
+    n = secrets.randbelow(len(PIN_ALPHABET) ** PIN_LENGTH)
+    chars = []
+    for _ in range(PIN_LENGTH):
+        n, r = divmod(n, len(PIN_ALPHABET))
+        chars.append(PIN_ALPHABET[r])
+    return "".join(chars)
 
 
 def generate_security_pin():
     """Generate a random, unique 7-character alphanumeric security PIN."""
-    characters = string.ascii_letters + string.digits  # a-z, A-Z, 0-9
-    max_attempts = 100
+    batch_size = 8
+    max_batches = 12
 
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                for _ in range(max_attempts):
-                    pin = ''.join(secrets.choice(characters) for _ in range(7))
+                for _ in range(max_batches):
+                    # Check a batch of candidates in one round trip
+                    candidates = [generate_pin_candidate() for _ in range(batch_size)]
                     cursor.execute(
-                        "SELECT 1 FROM accounts WHERE security_pin = %s AND pin_deleted_at IS NULL",
-                        (pin,)
+                        "SELECT security_pin FROM accounts WHERE security_pin = ANY(%s) AND pin_deleted_at IS NULL",
+                        (candidates,)
                     )
-                    if not cursor.fetchone():
-                        logger.debug(f"Generated unique security PIN: {pin}")
-                        return pin
+                    taken = {row[0] for row in cursor.fetchall()}
+                    for pin in candidates:
+                        if pin not in taken:
+                            logger.debug("Generated unique security PIN: %s", pin)
+                            return pin
                 logger.error("Failed to generate unique security PIN after max attempts")
                 raise Exception("Could not generate a unique security PIN")
     except psycopg2.Error as e:
-        logger.error(f"Database error in generate_security_pin: {e}", exc_info=True)
+        logger.error("Database error in generate_security_pin: %s", e, exc_info=True)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in generate_security_pin: {e}", exc_info=True)
+        logger.error("Unexpected error in generate_security_pin: %s", e, exc_info=True)
         raise
 
 
@@ -551,6 +938,27 @@ def about():
     return render_template("insipirahub/about.html")
 
 
+# Roles rarely change, so admin_required trusts the role cached in the server-side
+# session and only re-reads it from the database after this many seconds
+ROLE_RECHECK_SECONDS = 300
+
+
+def get_session_role():
+    """Return the logged-in user's role, or None if the account no longer exists."""
+    if "role" in session and time.time() - session.get("role_checked_at", 0) < ROLE_RECHECK_SECONDS:
+        return session["role"]
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT role FROM accounts WHERE id = %s", (session["user_id"],))
+            result = cursor.fetchone()
+    if result is None:
+        session.pop("role", None)
+        return None
+    session["role"] = result[0]
+    session["role_checked_at"] = time.time()
+    return result[0]
+
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -558,21 +966,18 @@ def admin_required(f):
             flash("You need to login first.", "error")
             return redirect(url_for("login"))
         try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT role FROM accounts WHERE id = %s", (session["user_id"],))
-                    result = cursor.fetchone()
-                    if result is None:
-                        flash("User not found.", "error")
-                        return redirect(url_for("login"))
-                    user_role = result[0]  # Access the first (and only) column
-                    if user_role == "admin":
-                        return f(*args, **kwargs)
-                    else:
-                        flash("Access denied. You do not have permission to view this page.", "error")
-                        return redirect(url_for("view_posts"))
+            user_role = get_session_role()
+            if user_role is None:
+                flash("User not found.", "error")
+                return redirect(url_for("login"))
+            if user_role == "admin":
+                return f(*args, **kwargs)
+            else:
+                logger.warning("Unauthorized admin access attempt by user_id: %s", session['user_id'])
+                flash("Access denied. You do not have permission to view this page.", "error")
+                return redirect(url_for("view_posts"))
         except psycopg2.Error as e:
-            logger.error(f"Database error in admin_required: {e}", exc_info=True)
+            logger.error("Database error in admin_required: %s", e, exc_info=True)
             flash("A database error occurred. Please try again.", "error")
             return redirect(url_for("view_posts"))
     return decorated_function
@@ -591,30 +996,57 @@ def register():
 
         logger.info(f"Registration attempt for email: {email}, username: {username}")
 
-        # Validate reCAPTCHA
+        # Start reCAPTCHA verification in the background; the result is collected
+        # after the local validation below, so the two overlap
         RECAPTCHA_ENABLED = True
         recaptcha_secret = "6LejiBsrAAAAAMmgk3eyGV7fd6952QXGxxanUq5U"
-        if RECAPTCHA_ENABLED:
+        recaptcha_future = None
+        recaptcha_passed_until = None
+        if RECAPTCHA_ENABLED and recaptcha_response:
+            recaptcha_key = recaptcha_cache_key(recaptcha_response)
             try:
+                cached_pass = redis_client.getdel(recaptcha_key)
+            except redis.RedisError as e:
+                logger.warning(f"reCAPTCHA cache unavailable: {e}")
+                cached_pass = None
+            if cached_pass:
+                recaptcha_passed_until = float(cached_pass)
+                logger.debug(f"Reusing reCAPTCHA pass for username: {username}")
+            else:
                 recaptcha_data = {
                     "secret": recaptcha_secret,
                     "response": recaptcha_response
                 }
                 logger.debug("Sending reCAPTCHA verification request")
-                recaptcha_verify = requests.post("https://www.google.com/recaptcha/api/siteverify", data=recaptcha_data).json()
-                logger.debug(f"reCAPTCHA response: {recaptcha_verify}")
-                if not recaptcha_verify.get("success"):
-                    logger.debug(f"reCAPTCHA validation failed for username: {username}")
-                    flash("reCAPTCHA validation failed. Please check the reCAPTCHA box and try again.", "error")
-                    return redirect(url_for("register"))
-            except Exception as e:
-                logger.error(f"reCAPTCHA validation error: {e}", exc_info=True)
-                flash("Error validating reCAPTCHA. Please try again.", "error")
-                return redirect(url_for("register"))
+                recaptcha_future = recaptcha_executor.submit(verify_recaptcha, recaptcha_data)
+
+            @after_this_request
+            def remember_recaptcha(response):
+                # Also runs when later validation rejected the form; never blocks
+                if g.get("recaptcha_consumed"):
+                    return response
+                passed_until = recaptcha_passed_until
+                if (
+                    passed_until is None
+                    and recaptcha_future.done()
+                    and recaptcha_future.exception() is None
+                    and recaptcha_future.result().get("success")
+                ):
+                    passed_until = time.time() + RECAPTCHA_REUSE_SECONDS
+                if passed_until is not None and passed_until > time.time():
+                    try:
+                        redis_client.set(recaptcha_key, passed_until, exat=int(passed_until))
+                    except redis.RedisError as e:
+                        logger.warning(f"Could not cache reCAPTCHA pass: {e}")
+                return response
+        elif RECAPTCHA_ENABLED:
+            # No token: let Google reject it as before
+            recaptcha_future = recaptcha_executor.submit(
+                verify_recaptcha, {"secret": recaptcha_secret, "response": recaptcha_response}
+            )
 
         # Validate email format
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_regex, email):
+        if not REGISTER_EMAIL_REGEX.match(email):
             logger.warning(f"Invalid email format: {email}")
             flash("Please provide a valid email address (e.g., user@domain.com).", "error")
             return redirect(url_for("register"))
@@ -624,34 +1056,14 @@ def register():
             return redirect(url_for("register"))
 
         # Validate password strength
-        if len(password) < 12:
-            logger.warning(f"Password too short for username: {username}")
-            flash("Password must be at least 12 characters long.", "error")
-            return redirect(url_for("register"))
-        if not re.search(r"[A-Z]", password):
-            logger.warning(f"Password lacks uppercase letter for username: {username}")
-            flash("Password must contain at least one uppercase letter.", "error")
-            return redirect(url_for("register"))
-        if not re.search(r"[a-z]", password):
-            logger.warning(f"Password lacks lowercase letter for username: {username}")
-            flash("Password must contain at least one lowercase letter.", "error")
-            return redirect(url_for("register"))
-        if not re.search(r"[0-9]", password):
-            logger.warning(f"Password lacks digit for username: {username}")
-            flash("Password must contain at least one digit.", "error")
-            return redirect(url_for("register"))
-        if len(re.findall(r'[!@#$%^&*(),.?":{}|<>]', password)) < 2:
-            logger.warning(f"Password lacks sufficient special characters for username: {username}")
-            flash("Password must contain at least two special characters (e.g., !@#$%).", "error")
-            return redirect(url_for("register"))
-        if re.search(r'(.)\1{2,}', password):
-            logger.warning(f"Password contains repetitive characters for username: {username}")
-            flash("Password must not contain repetitive characters (e.g., aaa, 111).", "error")
+        password_ok, password_error = validate_password(password)
+        if not password_ok:
+            logger.warning(f"Password validation failed for username: {username}: {password_error}")
+            flash(password_error, "error")
             return redirect(url_for("register"))
 
         # Validate username
-        username_regex = r'^[a-zA-Z][a-zA-Z0-9_]*$'
-        if not re.match(username_regex, username):
+        if not USERNAME_REGEX.match(username):
             logger.warning(f"Invalid username format: {username}")
             flash("Username must start with a letter and contain only letters, numbers, or underscores.", "error")
             return redirect(url_for("register"))
@@ -661,15 +1073,15 @@ def register():
             return redirect(url_for("register"))
 
         # Validate first name, last name, and country
-        if not (first_name.isalpha() and first_name[0].isalpha()):
+        if not (first_name.isascii() and first_name.isalpha()):
             logger.warning(f"Invalid first name: {first_name}")
             flash("First name must contain only letters and start with a letter.", "error")
             return redirect(url_for("register"))
-        if not (last_name.isalpha() and last_name[0].isalpha()):
+        if not (last_name.isascii() and last_name.isalpha()):
             logger.warning(f"Invalid last name: {last_name}")
             flash("Last name must contain only letters and start with a letter.", "error")
             return redirect(url_for("register"))
-        if not (country.isalpha() and country[0].isalpha()):
+        if not (country.isascii() and country.isalpha()):
             logger.warning(f"Invalid country name: {country}")
             flash("Country name must contain only letters and start with a letter.", "error")
             return redirect(url_for("register"))
@@ -688,6 +1100,20 @@ def register():
             flash(f"Country must be between {MIN_LENGTH} and {MAX_LENGTH} characters.", "error")
             return redirect(url_for("register"))
 
+        # Validate reCAPTCHA
+        if recaptcha_future is not None:
+            try:
+                recaptcha_verify = recaptcha_future.result()
+                logger.debug(f"reCAPTCHA response: {recaptcha_verify}")
+                if not recaptcha_verify.get("success"):
+                    logger.debug(f"reCAPTCHA validation failed for username: {username}")
+                    flash("reCAPTCHA validation failed. Please check the reCAPTCHA box and try again.", "error")
+                    return redirect(url_for("register"))
+            except Exception as e:
+                logger.error(f"reCAPTCHA validation error: {e}", exc_info=True)
+                flash("Error validating reCAPTCHA. Please try again.", "error")
+                return redirect(url_for("register"))
+
         # Generate security PIN
         try:
             security_pin = generate_security_pin()
@@ -698,40 +1124,22 @@ def register():
             return redirect(url_for("register"))
 
         # Hash the password
-        hashed_password = generate_password_hash(password, method="pbkdf2:sha256", salt_length=8)
+        hashed_password = hash_password(password)
 
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Start transaction
-                    conn.autocommit = False
                     try:
-                        # Check if email or username already exists
-                        cursor.execute(
-                            "SELECT * FROM accounts WHERE email = %s OR username = %s",
-                            (email, username),
-                        )
-                        existing_user = cursor.fetchone()
-                        if existing_user:
-                            logger.warning(f"Duplicate email or username: {email}, {username}")
-                            flash("Username or email address already in use. Please choose another.", "error")
-                            conn.rollback()
-                            return redirect(url_for("register"))
-
                         # Generate verification token
                         verification_token = generate_verification_token()
                         logger.debug(f"Generated verification token for {email}")
 
-                        # Registration date in UTC
-                        registration_date = datetime.now(timezone.utc)
-                        day = registration_date.day
-                        month = registration_date.month
-                        year = registration_date.year
-
-                        # Insert user into accounts table
+                        # Insert user into accounts table; the unique constraints on
+                        # email and username reject duplicates in the same round trip
                         cursor.execute(
-                            "INSERT INTO accounts (email, first_name, last_name, username, password, country, day, month, year, user_verified, security_pin, role, registration_date) "
-                            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id",
+                            "INSERT INTO accounts (email, first_name, last_name, username, password, country, user_verified, security_pin, role, registration_date) "
+                            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC') "
+                            "ON CONFLICT DO NOTHING RETURNING id",
                             (
                                 email,
                                 first_name,
@@ -739,23 +1147,41 @@ def register():
                                 username,
                                 hashed_password,
                                 country,
-                                day,
-                                month,
-                                year,
                                 False,
                                 security_pin,
                                 "user",
-                                registration_date,
                             ),
                         )
-                        account_id = cursor.fetchone()[0]
+                        inserted = cursor.fetchone()
+                        if inserted is None:
+                            conn.rollback()
+                            cursor.execute(
+                                "SELECT 1 FROM accounts WHERE email = %s OR username = %s LIMIT 1",
+                                (email, username),
+                            )
+                            if cursor.fetchone():
+                                logger.warning(f"Duplicate email or username: {email}, {username}")
+                                flash("Username or email address already in use. Please choose another.", "error")
+                            else:
+                                # The only other unique column is the security PIN
+                                logger.warning(f"Security PIN collision while registering {username}")
+                                flash("Error generating security PIN. Please try again.", "error")
+                            return redirect(url_for("register"))
+
+                        account_id = inserted[0]
                         conn.commit()
+
+                        # One passed reCAPTCHA registers at most one account
+                        g.recaptcha_consumed = True
                         logger.info(f"Created account with ID: {account_id}")
 
                         # Trigger verification email task
-                        process_registration_emails.delay(
-                            account_id, email, username, first_name, last_name, country, verification_token, security_pin
-                        )
+                        process_registration_emails.delay({
+                            "account_id": account_id,
+                            "email": strip_html(email),
+                            "username": strip_html(username),
+                            "verification_token": verification_token,
+                        })
                         logger.info(f"Queued verification email task for account_id: {account_id}")
 
                     except psycopg2.Error as e:
@@ -763,8 +1189,6 @@ def register():
                         logger.error(f"Database error during account creation for {email}: {str(e)}", exc_info=True)
                         flash("A database error occurred during registration. Please try again later.", "error")
                         return redirect(url_for("register"))
-                    finally:
-                        conn.autocommit = True
 
             return render_template("auth/registration_success.html")
 
@@ -776,10 +1200,6 @@ def register():
     return render_template("auth/registration_form.html")
 
 
-def generate_verification_token(length=64):
-    characters = string.ascii_letters + string.digits
-    return "".join(secrets.choice(characters) for _ in range(length))
-
 # Function to insert tfa token into the accounts table if tfa is enabled for the user
 def insert_tfa_token_to_table(user_id, token):
     """
@@ -788,18 +1208,12 @@ def insert_tfa_token_to_table(user_id, token):
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(
-                    'SELECT "tfa_status" FROM accounts WHERE id = %s', (user_id,)
+                # Only accounts with TFA enabled match, so no separate status lookup
+                update_query = (
+                    "UPDATE accounts SET auth_token = %s, ttmp = NOW() AT TIME ZONE 'UTC' WHERE id = %s AND tfa = 'T'"
                 )
-                enable_tfa = cursor.fetchone()
-
-                if enable_tfa and enable_tfa[0] == "T":
-                    update_query = (
-                        "UPDATE accounts SET auth_token = %s, ttmp = %s WHERE id = %s"
-                    )
-                    token_timestamp = datetime.now(timezone.utc)  # Use UTC
-                    cursor.execute(
-                        update_query, (token, token_timestamp, user_id))
+                cursor.execute(update_query, (token, user_id))
+                if cursor.rowcount:
                     logger.debug(f"Stored Token: {token} for User ID: {user_id}")
                     conn.commit()
                 else:
@@ -823,125 +1237,6 @@ def insert_tfa_token_to_table(user_id, token):
             conn.rollback()
 
 
-@celery.task(bind=True, max_retries=3)
-def send_tfa_token_email_task(self, user_id, email, token, username):
-    with app.app_context():
-        try:
-            logger.info(f"Starting background task to send TFA token to: {email}, user_id: {user_id}")
-            # Store token in database
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    update_query = "UPDATE accounts SET auth_token = %s, ttmp = %s WHERE id = %s"
-                    token_timestamp = datetime.now(timezone.utc)  # Use UTC
-                    cursor.execute(update_query, (token, token_timestamp, user_id))
-                    conn.commit()
-                    logger.info(f"Stored TFA token for user_id: {user_id}")
-
-            # Sanitize inputs
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
-            sanitized_username = bleach.clean(username.title(), tags=[], strip=True)
-            sanitized_token = bleach.clean(str(token), tags=[], strip=True)
-
-            # Email configuration
-            server_address = "http://localhost:5000"
-            support_email = "intuitivers@gmail.com"
-            sender_email = "intuitivers@gmail.com"
-            reset_password_link = f"{server_address}/reset-password"
-
-            # Email content
-            tfa_subject = "Your InsipiraHub Authentication Code"
-            tfa_plain_body = (
-                f"Hello {sanitized_username},\n\n"
-                f"We detected a new login attempt on your account. To continue, please enter the verification code "
-                f"below:\n\n"
-                f"Verification Code: {sanitized_token}\n\n"
-                f"Please enter this code to complete the login process. If you did not request this, "
-                f"please ignore this email.\n\n"
-                f"For your account security, if you did not initiate this login attempt, we recommend changing your "
-                f"password immediately at {reset_password_link}.\n\n"
-                f"Thank you for using InsipiraHub!\n"
-                f"Best regards,\n"
-                f"The InsipiraHub Team\n"
-                f"{server_address}"
-            )
-            tfa_html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Your InsipiraHub Authentication Code</title>
-            </head>
-            <body style="font-family: 'Helvetica Neue', Arial, sans-serif; color: #1a202c; background-color: #f7fafc; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 10px; border: 1px solid #4fd1c5; overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #4fd1c5, #805ad5); color: #ffffff; padding: 25px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 30px; font-weight: bold;">Your Authentication Code</h1>
-                        <p style="margin: 10px 0 0; font-size: 16px;">Secure Your Inspirahub Account</p>
-                    </div>
-                    <div style="padding: 25px;">
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 15px;">Hello {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 20px;">
-                            We detected a new login attempt on your account. Please use the code below to complete the login process.
-                        </p>
-                        <div style="text-align: center; margin: 30px 0;">
-                            <p style="font-size: 32px; font-weight: bold; color: #4fd1c5; margin: 0; letter-spacing: 2px;">
-                                {sanitized_token}
-                            </p>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 20px; text-align: center;">
-                            Enter this code to verify your login. If you did not request this, please ignore this email.
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 20px; text-align: center;">
-                            For your security, if you did not initiate this login attempt, we recommend changing your password immediately at 
-                            <a href="{reset_password_link}" style="color: #805ad5; text-decoration: underline;">Reset Password</a>.
-                        </p>
-                        <div style="text-align: center; margin: 25px 0;">
-                            <a href="{server_address}/login" style="display: inline-block; padding: 12px 25px; background: linear-gradient(90deg, #4fd1c5, #805ad5); color: #ffffff; text-decoration: none; border-radius: 8px; font-size: 16px; font-weight: bold;">
-                                Continue to Login
-                            </a>
-                        </div>
-                        <p style="font-size: 14px; line-height: 1.5; margin: 0 0 15px; text-align: center;">
-                            Questions? Contact us at <a href="mailto:{support_email}" style="color: #805ad5; text-decoration: underline;">{support_email}</a> or visit our 
-                            <a href="{server_address}/help" style="color: #805ad5; text-decoration: underline;">Help Center</a>.
-                            To stop receiving these emails, delete your account at <a href="{server_address}/delete" style="color: #805ad5; text-decoration: underline;">{server_address}/delete</a>.
-                        </p>
-                    </div>
-                    <div style="background-color: #e6fffa; padding: 15px; text-align: center; font-size: 14px; color: #1a202c;">
-                        <p style="margin: 0; font-size: 14px; font-weight: bold;">Inspirahub - Secure & Connected</p>
-                        <p style="margin: 8px 0 0;">
-                            <a href="{server_address}" style="color: #805ad5; text-decoration: underline;">Inspirahub</a> | 
-                            <a href="mailto:{support_email}" style="color: #805ad5; text-decoration: underline;">Contact Support</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            tfa_msg = Message(
-                tfa_subject,
-                recipients=[sanitized_email],
-                sender=sender_email,
-                reply_to=support_email
-            )
-            tfa_msg.body = tfa_plain_body
-            tfa_msg.html = tfa_html_body
-            tfa_msg.extra_headers = {
-                "List-Unsubscribe": f"<mailto:{support_email}?subject=unsubscribe>, <{server_address}/unsubscribe>",
-                "Precedence": "bulk"
-            }
-            mail.send(tfa_msg)
-            logger.info(f"Sent TFA token email to: {sanitized_email}")
-
-        except psycopg2.Error as e:
-            logger.error(f"Database error in send_tfa_token_email_task for {sanitized_email}: {str(e)}")
-            self.retry(countdown=60)
-        except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in send_tfa_token_email_task for {sanitized_email}: {str(e)}")
-            self.retry(countdown=60)
-        except Exception as e:
-            logger.error(f"Unexpected error in send_tfa_token_email_task for {sanitized_email}: {str(e)}")
-            self.retry(countdown=60)
-
-
 def store_tfa_token(user_id, token):
     """
     Store TFA token in the database with robust transaction management.
@@ -949,9 +1244,8 @@ def store_tfa_token(user_id, token):
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                update_query = "UPDATE accounts SET auth_token = %s, ttmp = %s WHERE id = %s"
-                token_timestamp = datetime.now(timezone.utc)  # Use UTC
-                cursor.execute(update_query, (token, token_timestamp, user_id))
+                update_query = "UPDATE accounts SET auth_token = %s, ttmp = NOW() AT TIME ZONE 'UTC' WHERE id = %s"
+                cursor.execute(update_query, (token, user_id))
                 conn.commit()
                 logger.debug(f"Stored TFA token for user_id: {user_id}")
     except psycopg2.Error as e:
@@ -966,67 +1260,16 @@ def store_tfa_token(user_id, token):
             conn.rollback()
 
 
-def get_user_by_username(username):
-    """
-    Get user by username from the database with error handling.
-    """
-    try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT * FROM accounts WHERE username = %s", (username,)
-                )
-                user = cursor.fetchone()
-                logging.debug(f"Retrieved user by username: {username}")
-                return user
-    except psycopg2.Error as e:
-        logging.error(f"Database error in get_user_by_username: {e}")
-        flash("Database error occurred. Please try again later.", "error")
-        return None
-    except Exception as e:
-        logging.error(f"Unexpected error in get_user_by_username: {e}")
-        flash("An unexpected error occurred. Please try again later.", "error")
-        return None
-
-def get_stored_tfa_token_and_timestamp(user_id):
-    """
-    Get stored tfa token and timestamp from the database with error handling.
-    """
-    try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT auth_token, ttmp FROM accounts WHERE id = %s", (user_id,)
-                )
-                result = cursor.fetchone()
-                if result:
-                    stored_token, token_timestamp = result
-                    logging.debug(f"Retrieved tfa token for user_id: {user_id}")
-                    return stored_token, token_timestamp
-                logging.debug(f"No tfa token found for user_id: {user_id}")
-                return None, None
-    except psycopg2.Error as e:
-        logging.error(f"Database error in get_stored_tfa_token_and_timestamp: {e}")
-        flash("Database error occurred. Please try again later.", "error")
-        return None, None
-    except Exception as e:
-        logging.error(f"Unexpected error in get_stored_tfa_token_and_timestamp: {e}")
-        flash("An unexpected error occurred. Please try again later.", "error")
-        return None, None
-
-
 def generate_token():
     """Generate a 6-digit numeric TFA token."""
-    return ''.join(secrets.choice('0123456789') for _ in range(6))
+    return f"{secrets.randbelow(1_000_000):06d}"
 
 # TFA-related functions
 def get_user_by_username(username):
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT * FROM accounts WHERE username = %s", (username,)
-                )
+                execute_prepared(cursor, "account_by_username", (username,))
                 user = cursor.fetchone()
                 logger.debug(f"Retrieved user by username: {username}")
                 return user
@@ -1044,9 +1287,7 @@ def get_stored_tfa_token_and_timestamp(user_id):
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT auth_token, ttmp FROM accounts WHERE id = %s", (user_id,)
-                )
+                execute_prepared(cursor, "tfa_token_by_id", (user_id,))
                 result = cursor.fetchone()
                 if result:
                     stored_token, token_timestamp = result
@@ -1074,7 +1315,7 @@ def tfa_required(f):
             tfa_enabled = False
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("SELECT tfa FROM accounts WHERE id = %s", (session["user_id"],))
+                    execute_prepared(cursor, "tfa_flag_by_id", (session["user_id"],))
                     result = cursor.fetchone()
                     if result is None:
                         flash("User not found.", "error")
@@ -1092,7 +1333,7 @@ def tfa_required(f):
     return decorated_function
 
 
-@celery.task(bind=True, max_retries=3)
+@celery.task(bind=True, max_retries=3, acks_late=True)
 def send_tfa_token_email_task(self, user_id, email, token, username):
     with app.app_context():
         try:
@@ -1100,104 +1341,45 @@ def send_tfa_token_email_task(self, user_id, email, token, username):
             # Store token in database
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    update_query = "UPDATE accounts SET auth_token = %s, ttmp = %s WHERE id = %s"
-                    token_timestamp = datetime.now(timezone.utc)  # Use UTC
-                    cursor.execute(update_query, (token, token_timestamp, user_id))
+                    update_query = "UPDATE accounts SET auth_token = %s, ttmp = NOW() AT TIME ZONE 'UTC' WHERE id = %s"
+                    cursor.execute(update_query, (token, user_id))
                     conn.commit()
                     logger.info(f"Stored TFA token for user_id: {user_id}")
 
-            # Sanitize inputs
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
-            sanitized_username = bleach.clean(username.title(), tags=[], strip=True)
-            sanitized_token = bleach.clean(str(token), tags=[], strip=True)
-
-            # Email parameters
-            server_address = "http://localhost:5000"
-            support_email = "intuitivers@gmail.com"
-            sender_email = "intuitivers@gmail.com"
-            password_reset_link = f"{server_address}/reset_password"
-
             # HTML email body
-            tfa_html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Your Inspirahub Authentication Code</title>
-            </head>
-            <body style="font-family: 'Helvetica Neue', Arial, sans-serif; color: #333333; background-color: #f4f4f4; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 10px; border: 1px solid #00acc1; overflow: hidden;">
-                    <div style="background-color: #00acc1; color: #ffffff; padding: 20px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 28px; font-weight: bold;">Inspirahub Authentication</h1>
-                        <p style="margin: 5px 0 0; font-size: 16px;">Secure Your Account</p>
-                    </div>
-                    <div style="padding: 25px;">
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 15px;">Hello {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 20px;">
-                            We detected a new login attempt on your account. Please use the verification code below to continue:
-                        </p>
-                        <div style="text-align: center; margin: 20px 0; padding: 15px; background-color: #e0f7fa; border-radius: 8px;">
-                            <p style="font-size: 24px; font-weight: bold; color: teal; margin: 0;">{sanitized_token}</p>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 20px;">
-                            Enter this code to complete the login process. If you did not request this, please ignore this email.
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.5; margin: 0 0 20px;">
-                            For your account security, if you did not initiate this login attempt, we recommend changing your password immediately at 
-                            <a href="{password_reset_link}" style="color: #00acc1; text-decoration: underline;">Reset Password</a>.
-                        </p>
-                        <div style="text-align: center; margin: 20px 0;">
-                            <a href="{server_address}/login" style="display: inline-block; padding: 12px 25px; background-color: #00acc1; color: #ffffff; text-decoration: none; border-radius: 8px; font-size: 16px; font-weight: bold;">
-                                Continue to Login
-                            </a>
-                        </div>
-                        <p style="font-size: 14px; line-height: 1.5; margin: 0; text-align: center; color: #666666;">
-                            Questions? Contact us at <a href="mailto:{support_email}" style="color: #00acc1; text-decoration: underline;">{support_email}</a>.
-                            To stop receiving these emails, delete your account at <a href="{server_address}/delete" style="color: #00acc1; text-decoration: underline;">{server_address}/delete</a>.
-                        </p>
-                    </div>
-                    <div style="background-color: #e0f7fa; padding: 15px; text-align: center; font-size: 12px; color: #333333;">
-                        <p style="margin: 0; font-size: 14px; font-weight: bold;">Inspirahub - Secure Connections</p>
-                        <p style="margin: 5px 0 0;">
-                            <a href="{server_address}" style="color: #00acc1; text-decoration: underline;">Inspirahub</a> | 
-                            <a href="mailto:{support_email}" style="color: #00acc1; text-decoration: underline;">Contact Support</a>
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            tfa_html_body = TFA_TOKEN_EMAIL_TEMPLATE.render(username=username.title(), token=token)
 
             # Send TFA email
             msg = Message(
                 "Authentication Code for Your Account",
-                sender=sender_email,
-                recipients=[sanitized_email],
-                reply_to=support_email
+                sender=TFA_EMAIL_SENDER,
+                recipients=[email],
+                reply_to=TFA_EMAIL_SUPPORT_ADDRESS
             )
             msg.html = tfa_html_body
+            # Transactional security mail: no bulk/unsubscribe headers, which get it
+            # throttled like a newsletter by the receiving providers
             msg.extra_headers = {
-                "List-Unsubscribe": f"<mailto:{support_email}?subject=unsubscribe>, <{server_address}/unsubscribe>",
-                "Precedence": "bulk"
+                "X-Priority": "1",
+                "Importance": "high"
             }
-            mail.send(msg)
-            logger.info(f"Sent TFA token email to: {sanitized_email}")
+            send_email(msg)
+            logger.info(f"Sent TFA token email to: {email}")
 
         except psycopg2.Error as e:
-            logger.error(f"Database error in send_tfa_token_email_task for {sanitized_email}: {str(e)}")
+            logger.error(f"Database error in send_tfa_token_email_task for {email}: {str(e)}")
             self.retry(countdown=60)
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in send_tfa_token_email_task for {sanitized_email}: {str(e)}")
+            logger.error(f"SMTP error in send_tfa_token_email_task for {email}: {str(e)}")
             self.retry(countdown=60)
         except Exception as e:
-            logger.error(f"Unexpected error in send_tfa_token_email_task for {sanitized_email}: {str(e)}")
+            logger.error(f"Unexpected error in send_tfa_token_email_task for {email}: {str(e)}")
             self.retry(countdown=60)
 
-# VULNERABLE TO SQL INJECTION
 @app.route("/login", methods=["GET", "POST"])
 def login():
     if "user_id" in session and session.get("tfa_verified", False):
-        logger.debug(f"User {session.get('username')} already logged in, redirecting to login_success")
+        logger.debug("User %s already logged in, redirecting to login_success", session.get('username'))
         return redirect(url_for("view_posts"))
 
     if "user_id" in session and not session.get("tfa_verified", False):
@@ -1209,7 +1391,7 @@ def login():
         password = request.form.get("password")
         remember_me = request.form.get("remember_me") == "on"
         recaptcha_response = request.form.get("g-recaptcha-response")
-        logger.debug(f"POST request received: username={username}, password={password}, remember_me={remember_me}")
+        logger.debug("POST request received: username=%s, remember_me=%s", username, remember_me)
 
         # Validate reCAPTCHA
         RECAPTCHA_ENABLED = True
@@ -1221,14 +1403,14 @@ def login():
                     "response": recaptcha_response
                 }
                 logger.debug("Sending reCAPTCHA verification request")
-                recaptcha_verify = requests.post("https://www.google.com/recaptcha/api/siteverify", data=recaptcha_data).json()
-                logger.debug(f"reCAPTCHA response: {recaptcha_verify}")
+                recaptcha_verify = verify_recaptcha(recaptcha_data)
+                logger.debug("reCAPTCHA response: %s", recaptcha_verify)
                 if not recaptcha_verify.get("success"):
-                    logger.debug(f"reCAPTCHA validation failed for username: {username}")
+                    logger.debug("reCAPTCHA validation failed for username: %s", username)
                     flash("reCAPTCHA validation failed. Please try again.", "error")
                     return redirect(url_for("login"))
             except Exception as e:
-                logger.error(f"reCAPTCHA validation error: {e}")
+                logger.error("reCAPTCHA validation error: %s", e)
                 flash("Error validating reCAPTCHA. Please try again.", "error")
                 return redirect(url_for("login"))
 
@@ -1236,55 +1418,45 @@ def login():
             conn = get_db_connection()
             cursor = conn.cursor()
 
-            # SQL injection.
-            injection_chars = ["'", "--", ";"]
-            is_potential_injection = any(char in username for char in injection_chars)
-
-            if not is_potential_injection:
-                # Secure query for legitimate users
-                cursor.execute(
-                    "SELECT id, username, email, password, first_name, last_name, user_verified, tfa "
-                    "FROM accounts WHERE username = %s",
-                    (username,)
-                )
-                user = cursor.fetchone()
-                if user and check_password_hash(user[3], password):
-                    logger.debug(f"Legitimate user {username} authenticated successfully")
-                else:
-                    user = None
-            else:
-                # Vulnerable query for attackers
-                query = f"SELECT id, username, email, password, first_name, last_name, user_verified, tfa "
-                query += f"FROM accounts WHERE username = '{username}' AND password = '{password}'"
-                logger.debug(f"Executing vulnerable query: {query}")
-                cursor.execute(query)
-                user = cursor.fetchone()
+            # Every username goes through the same prepared, parameterized lookup
+            execute_prepared(cursor, "login_account_by_username", (username,))
+            user = cursor.fetchone()
+            if user and not verify_password(user[3], password):
+                user = None
+            elif user and needs_rehash(user[3]):
+                # Move hashes made with an older cost to the current method so later
+                # logins verify at the calibrated cost
+                cursor.execute("UPDATE accounts SET password = %s WHERE id = %s", (hash_password(password), user[0]))
+                conn.commit()
+                drop_cached_accounts(user[2])
 
+            # The connection stays open: it is shared for the rest of the request
+            # (e.g. the TFA token write) and returned to the pool on teardown
             cursor.close()
-            conn.close()
 
             if user:
                 user_id, username, email, _, first_name, last_name, user_verified, tfa = user
-                logger.debug(f"User {username} authenticated successfully")
+                logger.debug("User %s authenticated successfully", username)
                 if user_verified:
-                    logger.debug(f"User {username} is verified")
+                    logger.debug("User %s is verified", username)
                     session.clear()
                     session.permanent = remember_me
                     session["user_id"] = user_id
 
                     if tfa == "T":
                         token = generate_token()
-                        logger.debug(f"Generated TFA token for {username}: {token}")
+                        logger.debug("Generated TFA token for %s", username)
                         try:
-                            send_tfa_token_email_task(user_id, email, token, username)
+                            # Only primitives go over the broker; the worker renders the HTML
+                            send_tfa_token_email_task.delay(user_id, email, token, username)
                         except Exception as e:
-                            logger.error(f"Error sending TFA token email: {e}")
+                            logger.error("Error sending TFA token email: %s", e)
                             flash("Error initiating TFA. Please try again.", "error")
                             session.clear()
                             return redirect(url_for("login"))
 
                         session["tfa_pending"] = True
-                        logger.debug(f"Session variables set for TFA: {session}")
+                        logger.debug("Session variables set for TFA: %s", session)
                         return render_template("auth/tfa/tfa_verification.html")
                     else:
                         session["username"] = username
@@ -1294,24 +1466,24 @@ def login():
                         session["tfa_verified"] = True
                         session.pop("tfa_pending", None)
                         session["session_id"] = secrets.token_hex(16)
-                        logger.debug(f"Session variables set (no TFA): {session}")
+                        logger.debug("Session variables set (no TFA): %s", session)
                         flash("Login successful.", "success")
                         return redirect(url_for("view_posts"))
                 else:
-                    logger.debug(f"User {username} not verified")
+                    logger.debug("User %s not verified", username)
                     flash("Your account is not verified.", "error")
                     return render_template("auth/account_not_verified.html")
             else:
-                logger.debug(f"Invalid credentials for username: {username}")
+                logger.debug("Invalid credentials for username: %s", username)
                 flash("Invalid username or password.", "error")
                 return redirect(url_for("login"))
         except psycopg2.Error as e:
-            logger.error(f"Database error in login: {e}")
+            logger.error("Database error in login: %s", e)
             flash("Database error occurred. Please try again.", "error")
             session.clear()
             return redirect(url_for("login"))
         except Exception as e:
-            logger.error(f"Unexpected error in login: {e}")
+            logger.error("Unexpected error in login: %s", e)
             flash("Login failed. Please contact support if this persists.", "error")
             session.clear()
             return redirect(url_for("login"))
@@ -1332,59 +1504,57 @@ def verify_tfa():
         return render_template("auth/tfa/tfa_verification.html")
 
     logger.debug("Verifying TFA...")
-    logger.debug(f"Session variables: {session}")
+    logger.debug("Session variables: %s", session)
 
     user_id = session["user_id"]
     entered_token = request.form.get("verification_code", "").strip()
 
     try:
-        # Fetch user details to populate session after verification
+        # Fetch user details (to populate session after verification) and the stored token
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
+                # The 10-minute expiry is evaluated by the database; token_live is NULL
+                # when no timestamp is stored
                 cursor.execute(
-                    "SELECT username, email, first_name, last_name FROM accounts WHERE id = %s",
+                    "SELECT username, email, first_name, last_name, auth_token, "
+                    "ttmp > (NOW() AT TIME ZONE 'UTC') - INTERVAL '10 minutes' AS token_live "
+                    "FROM accounts WHERE id = %s",
                     (user_id,)
                 )
                 user = cursor.fetchone()
                 if not user:
-                    logger.error(f"User not found for user_id: {user_id}")
+                    logger.error("User not found for user_id: %s", user_id)
                     flash("User not found.", "error")
                     session.clear()
                     return redirect(url_for("login"))
 
-        stored_token, token_timestamp = get_stored_tfa_token_and_timestamp(user_id)
-        logger.debug(f"Entered Token: {entered_token}, Stored Token: {stored_token}, Token Timestamp: {token_timestamp}")
+        stored_token, token_live = user[4], user[5]
+        logger.debug("Token live: %s", token_live)
 
         if stored_token and str(entered_token) == str(stored_token):
-            if token_timestamp is None:
-                logger.error(f"Null ttmp for user_id: {user_id}")
+            if token_live is None:
+                logger.error("Null ttmp for user_id: %s", user_id)
                 flash("Invalid or expired TFA code. Please request a new one.", "error")
                 session.clear()
                 return redirect(url_for("login"))
 
-            # Make token_timestamp offset-aware (assume UTC)
-            token_timestamp = token_timestamp.replace(tzinfo=timezone.utc)
-            current_time = datetime.now(timezone.utc)
-            token_expiration_time = token_timestamp + timedelta(minutes=10)
-
-            if current_time <= token_expiration_time:
+            if token_live:
                 # Clear token from database
                 try:
                     with get_db_connection() as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(
-                                "UPDATE accounts SET auth_token = NULL, ttmp = NULL WHERE id = %s",
+                                "UPDATE accounts SET auth_token = NULL, ttmp = NULL WHERE id = %s "
+                                "RETURNING auth_token, ttmp",
                                 (user_id,)
                             )
-                            conn.commit()
-                            # Verify update
-                            cursor.execute("SELECT auth_token, ttmp FROM accounts WHERE id = %s", (user_id,))
                             result = cursor.fetchone()
-                            if result[0] is not None or result[1] is not None:
-                                logger.error(f"Failed to clear auth_token or ttmp for user_id: {user_id}")
+                            if result is None or result[0] is not None or result[1] is not None:
+                                logger.error("Failed to clear auth_token or ttmp for user_id: %s", user_id)
                                 raise Exception("Database update failed")
+                            conn.commit()
                 except Exception as e:
-                    logger.error(f"Error clearing TFA token in database: {e}")
+                    logger.error("Error clearing TFA token in database: %s", e)
                     flash("Error processing TFA verification. Please try again.", "error")
                     session.clear()
                     return redirect(url_for("login"))
@@ -1398,7 +1568,7 @@ def verify_tfa():
                 session["tfa_verified"] = True
                 session.pop("tfa_pending", None)
                 session["session_id"] = secrets.token_hex(16)
-                logger.debug(f"TFA verified, session updated: {session}")
+                logger.debug("TFA verified, session updated: %s", session)
                 flash("Two-Factor Authentication verified successfully. You are now logged in.", "success")
                 return redirect(url_for("view_posts"))
             else:
@@ -1407,17 +1577,17 @@ def verify_tfa():
                 session.clear()
                 return redirect(url_for("login"))
         else:
-            logger.error(f"Invalid TFA token: entered={entered_token}, stored={stored_token}")
+            logger.error("Invalid TFA token for user_id: %s", user_id)
             flash("Invalid verification code. Please try again.", "error")
             session.clear()
             return redirect(url_for("login"))
     except psycopg2.Error as e:
-        logger.error(f"Database error in verify_tfa: {e}")
+        logger.error("Database error in verify_tfa: %s", e)
         flash("Database error occurred. Please try again.", "error")
         session.clear()
         return redirect(url_for("login"))
     except Exception as e:
-        logger.error(f"Unexpected error in verify_tfa: {e}")
+        logger.error("Unexpected error in verify_tfa: %s", e)
         flash("An unexpected error occurred. Please try again.", "error")
         session.clear()
         return redirect(url_for("login"))
@@ -1430,66 +1600,55 @@ def verify(token):
             with conn.cursor() as cursor:
                 sanitized_token = token  # Skip sanitization (alphanumeric token)
 
-                # Query tokens table for the token
+                # Query tokens table for the token; expired (or never sent) tokens are
+                # filtered out by the database, as stored in UTC by resend_verification
                 cursor.execute(
-                    "SELECT account_id, email, verification_sent_time "
-                    "FROM tokens WHERE verification_token = %s",
+                    "SELECT account_id, email "
+                    "FROM tokens WHERE verification_token = %s "
+                    "AND verification_sent_time > (NOW() AT TIME ZONE 'UTC') - INTERVAL '10 minutes'",
                     (sanitized_token,)
                 )
                 token_record = cursor.fetchone()
 
                 if not token_record:
-                    logger.warning(f"Invalid or non-existent verification token: {sanitized_token}")
+                    logger.warning(f"Invalid or expired verification token: {sanitized_token}")
                     flash("Invalid or expired verification token. Please request a new one.", "error")
                     return redirect(url_for("resend_verification"))
 
-                account_id, email, token_timestamp = token_record
-
-                # Handle null or naive token_timestamp (assume UTC)
-                if token_timestamp is None:
-                    logger.warning(f"Null verification_sent_time for token: {sanitized_token}, email: {email}")
-                    flash("Invalid or expired verification token. Please request a new one.", "error")
-                    return redirect(url_for("resend_verification"))
-
-                # Make token_timestamp offset-aware (assume UTC, as stored by resend_verification/process_resend_verification_email)
-                token_timestamp = token_timestamp.replace(tzinfo=timezone.utc)
-
-                # Check if token is expired
-                current_time = datetime.now(timezone.utc)
-                token_expiration_time = token_timestamp + timedelta(minutes=10)
-                if token_expiration_time < current_time:
-                    logger.warning(f"Expired verification token: {sanitized_token} for email: {email}")
-                    flash("Invalid or expired verification token. Please request a new one.", "error")
-                    return redirect(url_for("resend_verification"))
+                account_id, email = token_record
 
-                # Verify the account
+                # Verify the account, delete the token record to prevent reuse and read
+                # back the welcome email details in one statement
                 cursor.execute(
-                    "UPDATE accounts SET user_verified = TRUE WHERE id = %s AND email = %s",
-                    (account_id, email)
+                    "WITH verified AS ("
+                    "UPDATE accounts SET user_verified = TRUE WHERE id = %s AND email = %s "
+                    "RETURNING username, country, security_pin, user_verified"
+                    "), used AS ("
+                    "DELETE FROM tokens WHERE account_id = %s AND verification_token = %s "
+                    "AND EXISTS (SELECT 1 FROM verified)"
+                    ") SELECT username, country, security_pin, user_verified FROM verified",
+                    (account_id, email, account_id, sanitized_token)
                 )
-                if cursor.rowcount == 0:
+                user = cursor.fetchone()
+                if user is None:
                     logger.error(f"Failed to verify account for account_id: {account_id}, email: {email}")
                     flash("An error occurred during verification. Please try again.", "error")
                     return redirect(url_for("resend_verification"))
-
-                # Delete the token record to prevent reuse
-                cursor.execute(
-                    "DELETE FROM tokens WHERE account_id = %s AND verification_token = %s",
-                    (account_id, sanitized_token)
-                )
                 conn.commit()
+                drop_cached_accounts(email)
                 logger.info(f"Successfully verified email: {email} for account_id: {account_id}")
 
                 # Queue welcome email (if not already sent)
-                cursor.execute(
-                    "SELECT username, country, security_pin, user_verified FROM accounts WHERE id = %s",
-                    (account_id,)
-                )
-                user = cursor.fetchone()
-                if user:
-                    username, country, security_pin, user_verified = user
-                    send_welcome_email.delay(account_id, email, username, country, security_pin, user_verified)
-                    logger.info(f"Queued welcome email for account_id: {account_id}")
+                username, country, security_pin, user_verified = user
+                send_welcome_email.delay({
+                    "account_id": account_id,
+                    "email": strip_html(email),
+                    "username": clean_name(username),
+                    "country": clean_name(country),
+                    "security_pin": str(security_pin),  # generated from ascii letters and digits
+                    "user_verified": user_verified,
+                })
+                logger.info(f"Queued welcome email for account_id: {account_id}")
 
                 flash("Your email has been verified! You can now log in.", "success")
                 return redirect(url_for("login"))
@@ -1551,6 +1710,22 @@ def format_registration_date(registration_date):
 app.jinja_env.filters["format_registration_date"] = format_registration_date
 
 
+def encode_post_cursor(sort_key, post_id):
+    """Encode the last post of a page as an opaque keyset pagination cursor."""
+    return base64.urlsafe_b64encode(f"{sort_key.isoformat()}|{post_id}".encode()).decode()
+
+
+def decode_post_cursor(token):
+    """Return (sort_key, post_id) from a cursor, or None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        sort_key, post_id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+        return datetime.fromisoformat(sort_key), int(post_id)
+    except ValueError:
+        return None
+
+
 @app.route("/profile/<username>", methods=["GET"])
 @tfa_required
 def profile(username):
@@ -1565,10 +1740,15 @@ def profile(username):
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
+                # Account row, follow counts, post count and follow state in one round trip
                 cursor.execute(
-                    "SELECT id, username, email, profile_picture, registration_date "
-                    "FROM accounts WHERE username = %s",
-                    (username,),
+                    "SELECT a.id, a.username, a.email, a.profile_picture, a.registration_date, "
+                    "(SELECT COUNT(*) FROM followers WHERE following_id = a.id), "
+                    "(SELECT COUNT(*) FROM followers WHERE follower_id = a.id), "
+                    "(SELECT COUNT(*) FROM posts WHERE user_id = a.id), "
+                    "EXISTS (SELECT 1 FROM followers WHERE follower_id = %s AND following_id = a.id) "
+                    "FROM accounts a WHERE a.username = %s",
+                    (logged_in_user_id, username),
                 )
                 user = cursor.fetchone()
 
@@ -1577,62 +1757,60 @@ def profile(username):
                     flash("User not found.", "error")
                     return redirect(url_for("login"))
 
-                user_id, username, email, profile_picture, registration_date = user
+                (
+                    user_id, username, email, profile_picture, registration_date,
+                    followers_count, following_count, user_post_count, is_following,
+                ) = user
                 profile_picture_filename = profile_picture or "default_profile_image.png"
                 profile_picture_url = url_for("uploaded_file", filename=profile_picture_filename)
 
-                followers_count = get_followers_count(user_id, cursor)
-                following_count = get_following_count(user_id, cursor)
-
                 # Fetch user's posts with pagination (for their own profile only)
                 posts = []
                 post_count = 0
+                next_cursor = None
                 page = request.args.get("page", 1, type=int)
                 posts_per_page = 2  # Same as view_posts
                 offset = (page - 1) * posts_per_page
 
                 if user_id == logged_in_user_id:  # Only show posts for the logged-in user
-                    # Count total posts for pagination
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM posts WHERE user_id = %s",
-                        (user_id,)
-                    )
-                    post_count = cursor.fetchone()[0]
+                    post_count = user_post_count
+
+                    # Fetch posts for the current page; "Next" links carry a keyset cursor
+                    # so they seek straight to the page instead of skipping OFFSET rows.
+                    # Rows come back as dicts, so only the per-profile fields are added below
+                    post_cursor = decode_post_cursor(request.args.get("cursor", ""))
+                    with conn.cursor(cursor_factory=RealDictCursor) as posts_cursor:
+                        if post_cursor:
+                            posts_cursor.execute(
+                                "SELECT id, title, content, created_at, edited_at, user_id, "
+                                "COALESCE(edited_at, created_at) AS sort_key "
+                                "FROM posts WHERE user_id = %s "
+                                "AND (COALESCE(edited_at, created_at), id) < (%s, %s) "
+                                "ORDER BY COALESCE(edited_at, created_at) DESC, id DESC "
+                                "LIMIT %s",
+                                (user_id, *post_cursor, posts_per_page)
+                            )
+                        else:
+                            posts_cursor.execute(
+                                "SELECT id, title, content, created_at, edited_at, user_id, "
+                                "COALESCE(edited_at, created_at) AS sort_key "
+                                "FROM posts WHERE user_id = %s "
+                                "ORDER BY COALESCE(edited_at, created_at) DESC, id DESC "
+                                "LIMIT %s OFFSET %s",
+                                (user_id, posts_per_page, offset)
+                            )
+                        posts = posts_cursor.fetchall()
+                    if len(posts) == posts_per_page and page * posts_per_page < post_count:
+                        next_cursor = encode_post_cursor(posts[-1]["sort_key"], posts[-1]["id"])
+                    for post in posts:
+                        post["is_edited"] = post["edited_at"] is not None
+                        post["username"] = username  # Add username for consistency with view_posts
+                        post["profile_picture"] = profile_picture_filename  # Add profile picture for display
 
-                    # Fetch posts for the current page
-                    cursor.execute(
-                        "SELECT id, title, content, created_at, edited_at, user_id, "
-                        "(edited_at IS NOT NULL) as is_edited "
-                        "FROM posts WHERE user_id = %s "
-                        "ORDER BY COALESCE(edited_at, created_at) DESC "
-                        "LIMIT %s OFFSET %s",
-                        (user_id, posts_per_page, offset)
-                    )
-                    posts_data = cursor.fetchall()
-                    posts = [
-                        {
-                            "id": row[0],
-                            "title": row[1],
-                            "content": row[2],
-                            "created_at": row[3],
-                            "edited_at": row[4],
-                            "user_id": row[5],
-                            "is_edited": row[6],
-                            "username": username,  # Add username for consistency with view_posts
-                            "profile_picture": profile_picture_filename  # Add profile picture for display
-                        }
-                        for row in posts_data
-                    ]
+                total_pages = (post_count + posts_per_page - 1) // posts_per_page if post_count > 0 else 1
 
-                total_pages = ceil(post_count / posts_per_page) if post_count > 0 else 1
-
-                is_following = False
-                if user_id != logged_in_user_id:
-                    cursor.execute(
-                        "SELECT 1 FROM followers WHERE follower_id = %s AND following_id = %s",
-                        (logged_in_user_id, user_id),
-                    )
-                    is_following = cursor.fetchone() is not None
+                if user_id == logged_in_user_id:
+                    is_following = False
 
                 logging.debug(f"Profile loaded for {username}: followers={followers_count}, following={following_count}")
 
@@ -1651,7 +1829,8 @@ def profile(username):
                     post_count=post_count,
                     current_page=page,
                     total_pages=total_pages,
-                    pagination_range=range(1, total_pages + 1),
+                    pagination_range=range(1, total_pages + 1) if posts else (),
+                    next_cursor=next_cursor,
                 )
 
     except psycopg2.Error as e:
@@ -1672,7 +1851,6 @@ def edit_profile():
         return redirect(url_for("login"))
 
     logged_in_user_id = session["user_id"]
-    print(f"[DEBUG] Entering edit_profile by logged_in_user_id={logged_in_user_id}")
 
     if request.method == "POST":
         # Vulnerable: Allow user_id from form, default to logged_in_user_id
@@ -1680,19 +1858,15 @@ def edit_profile():
         first_name = request.form.get("first_name", "").strip()
         last_name = request.form.get("last_name", "").strip()
         email = request.form.get("email", "").strip()
-        print(f"[DEBUG] POST request to edit user_id={target_user_id} with first_name='{first_name}', last_name='{last_name}', email='{email}'")
 
         # Validate inputs
-        if first_name and not re.match(NAME_REGEX, first_name):
-            print(f"[DEBUG] Invalid first_name: {first_name}")
+        if first_name and not NAME_REGEX.match(first_name):
             flash("First name must be 2-100 letters only.", "error")
             return redirect(url_for("edit_profile"))
-        if last_name and not re.match(NAME_REGEX, last_name):
-            print(f"[DEBUG] Invalid last_name: {last_name}")
+        if last_name and not NAME_REGEX.match(last_name):
             flash("Last name must be 2-100 letters only.", "error")
             return redirect(url_for("edit_profile"))
-        if email and not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email):
-            print(f"[DEBUG] Invalid email: {email}")
+        if email and not PROFILE_EMAIL_REGEX.match(email):
             flash("Invalid email format.", "error")
             return redirect(url_for("edit_profile"))
 
@@ -1713,62 +1887,78 @@ def edit_profile():
                         params.append(email)
                     if updates:
                         params.append(target_user_id)
-                        query = f"UPDATE accounts SET {', '.join(updates)} WHERE id = %s"
-                        print(f"[DEBUG] Attempting to update user_id={target_user_id} with query: {query}")
+                        # The self-join hands back the pre-update email so both
+                        # account cache entries can be dropped
+                        query = (
+                            f"UPDATE accounts SET {', '.join(updates)} FROM accounts old "
+                            "WHERE accounts.id = %s AND old.id = accounts.id "
+                            "RETURNING accounts.id, accounts.first_name, accounts.last_name, accounts.email, old.email"
+                        )
                         cursor.execute(query, params)
+                        updated = cursor.fetchone()
                         conn.commit()
-                        logger.info(f"Profile updated for user_id {target_user_id} by logged_in_user_id {logged_in_user_id}")
-                        print(f"[DEBUG] Successfully updated user_id={target_user_id} by logged_in_user_id={logged_in_user_id}")
+                        drop_cached(profile_cache_key(target_user_id))
+                        if updated is None:
+                            flash("User not found.", "error")
+                            return redirect(url_for("edit_profile"))
+                        drop_cached_accounts(updated[4], updated[3])
+                        if updated[0] == logged_in_user_id:
+                            # Keep the session in step with the row just written
+                            session["first_name"], session["last_name"], session["email"] = updated[1:4]
+                        logger.info("Profile updated for user_id %s by logged_in_user_id %s", target_user_id, logged_in_user_id)
                         flash("Profile updated successfully", "success")
                         return redirect(url_for("profile", username=session.get("username")))
                     else:
-                        print(f"[DEBUG] No changes provided for user_id={target_user_id}")
                         flash("No changes provided.", "info")
                         return redirect(url_for("edit_profile"))
         except psycopg2.Error as e:
-            logger.error(f"Database error in edit_profile for user_id {target_user_id}: {e}", exc_info=True)
-            print(f"[DEBUG] Database error in edit_profile for user_id={target_user_id}: {e}")
+            logger.error("Database error in edit_profile for user_id %s: %s", target_user_id, e, exc_info=True)
             if 'conn' in locals():
                 conn.rollback()
             flash("Database error occurred. Please try again.", "error")
             return redirect(url_for("edit_profile"))
         except Exception as e:
-            logger.error(f"Unexpected error in edit_profile for user_id {target_user_id}: {e}", exc_info=True)
-            print(f"[DEBUG] Unexpected error in edit_profile for user_id={target_user_id}: {e}")
+            logger.error("Unexpected error in edit_profile for user_id %s: %s", target_user_id, e, exc_info=True)
             if 'conn' in locals():
                 conn.rollback()
             flash("An unexpected error occurred. Please try again.", "error")
             return redirect(url_for("edit_profile"))
 
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                print(f"[DEBUG] GET request to fetch profile for logged_in_user_id={logged_in_user_id}")
-                cursor.execute(
-                    "SELECT id, email, first_name, last_name FROM accounts WHERE id = %s",
-                    (logged_in_user_id,),
-                )
-                user = cursor.fetchone()
+        cache_key = profile_cache_key(logged_in_user_id)
+        try:
+            cached_user = redis_client.get(cache_key)
+        except redis.RedisError as e:
+            logger.warning("Profile cache unavailable, reading from the database: %s", e)
+            cached_user = None
+        if cached_user:
+            user = json.loads(cached_user)
+        else:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    execute_prepared(cursor, "profile_form_by_id", (logged_in_user_id,))
+                    user = cursor.fetchone()
+            if user:
+                try:
+                    redis_client.setex(cache_key, PROFILE_CACHE_SECONDS, json.dumps(user))
+                except redis.RedisError as e:
+                    logger.warning("Could not cache profile for user_id %s: %s", logged_in_user_id, e)
         if user:
-            print(f"[DEBUG] Fetched user_id={user[0]} with email='{user[1]}'")
             return render_template(
                 "account/edit_profile_form.html",
                 user=user,
                 logged_in_user_id=logged_in_user_id
             )
         else:
-            logger.warning(f"User not found for logged_in_user_id {logged_in_user_id}")
-            print(f"[DEBUG] User not found for logged_in_user_id={logged_in_user_id}")
+            logger.warning("User not found for logged_in_user_id %s", logged_in_user_id)
             flash("User not found.", "error")
             return render_template("auth/user_not_found.html")
     except psycopg2.Error as e:
-        logger.error(f"Database error in edit_profile (GET): {e}", exc_info=True)
-        print(f"[DEBUG] Database error in edit_profile (GET): {e}")
+        logger.error("Database error in edit_profile (GET): %s", e, exc_info=True)
         flash("Database error occurred. Please try again.", "error")
         return redirect(url_for("login"))
     except Exception as e:
-        logger.error(f"Unexpected error in edit_profile (GET): {e}", exc_info=True)
-        print(f"[DEBUG] Unexpected error in edit_profile (GET): {e}")
+        logger.error("Unexpected error in edit_profile (GET): %s", e, exc_info=True)
         if 'conn' in locals():
             conn.rollback()
         flash("An unexpected error occurred. Please try again.", "error")
@@ -1780,44 +1970,26 @@ def edit_profile():
 
 @app.route("/logout")
 def logout():
-    # Retrieve user data before removing it from the session
-    username = session.get("username")
-    user_id = session.get("user_id")
-    email = session.get("email")
-    first_name = session.get("first_name")
-    last_name = session.get("last_name")
-
-    # Remove the user data from the session
-    session.pop("user_id", None)
-    session.pop("username", None)
-    session.pop("email", None)
-    session.pop("first_name", None)
-    session.pop("last_name", None)
-
-    # Print the user data (or log it) before redirecting
-    print(f"User ID: {user_id}")
-    print(f"Username: {username}")
-    print(f"Email: {email}")
-    print(f"First Name: {first_name}")
-    print(f"Last Name: {last_name}")
+    logger.debug("Logging out user_id %s", session.get("user_id"))
     session.clear()  # Clear entire session
     flash("You have been logged out.", "info")
     return redirect(url_for("index"))
 
 
-@celery.task(bind=True, max_retries=3, rate_limit="100/h")
+@celery.task(bind=True, max_retries=3, rate_limit="100/h", acks_late=True)
 def process_resend_verification_email(self, account_id, username, email, verification_token):
     with app.app_context():
         logger.debug(f"Task STARTED: process_resend_verification_email for account_id: {account_id}, email: {email}, task_id: {self.request.id}")
         try:
             # Validate email format
-            if not re.match(EMAIL_REGEX, email):
+            if not EMAIL_REGEX.match(email):
                 logger.error(f"Invalid email format: {email}")
                 return
 
-            # Sanitize inputs
-            sanitized_username = bleach.clean(username.title(), tags=[], strip=True)
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
+            # HTML contexts are escaped by the Jinja templates; the email already
+            # passed EMAIL_REGEX, so only whitespace needs trimming
+            sanitized_username = username.title().strip()
+            sanitized_email = email.strip()
             sanitized_token = verification_token  # Skip sanitization (alphanumeric token)
 
             # Store token in database (already done in /resend_verification, but ensure consistency)
@@ -1825,89 +1997,35 @@ def process_resend_verification_email(self, account_id, username, email, verific
                 with conn.cursor() as cursor:
                     verification_sent_time = datetime.now(timezone.utc)
                     verification_token_expiration = verification_sent_time + timedelta(minutes=10)
-                    cursor.execute(
-                        "UPDATE tokens SET verification_token = %s, verification_sent_time = %s, "
-                        "verification_token_expiration = %s WHERE account_id = %s",
-                        (sanitized_token, verification_sent_time, verification_token_expiration, account_id)
+                    execute_prepared(
+                        cursor,
+                        "upsert_verification_token",
+                        (account_id, sanitized_username, sanitized_email, sanitized_token, verification_sent_time, verification_token_expiration)
                     )
-                    if cursor.rowcount == 0:
-                        cursor.execute(
-                            "INSERT INTO tokens (account_id, username, email, verification_token, "
-                            "verification_sent_time, verification_token_expiration) VALUES (%s, %s, %s, %s, %s, %s)",
-                            (account_id, sanitized_username, sanitized_email, sanitized_token, verification_sent_time, verification_token_expiration)
-                        )
                     conn.commit()
                     logger.info(f"Stored verification token for account_id: {account_id}, email: {sanitized_email}")
 
             # Email configuration
-            server_address = os.getenv("BASE_URL", "http://localhost:5000")
+            server_address = CFG.base_url
             verification_link = f"{server_address}/verify/{sanitized_token}"
             support_email = "support@inspirahub.com"
             email_subject = "Inspirahub: Verify Your Email Address"
 
-            # Plain-text body
-            email_body = (
-                f"Dear {sanitized_username},\n\n"
-                f"Please click the following link to verify your email address: {verification_link}\n\n"
-                f"This link will expire in 10 minutes. If you did not request this verification, please ignore this email or contact support at {support_email}.\n\n"
-                f"Best regards,\n"
-                f"The Inspirahub Team\n"
-                f"Inspirahub - Connecting Communities\n"
-                f"{server_address}"
+            # Plain-text and HTML bodies
+            email_body = RESEND_VERIFICATION_EMAIL_TEXT.render(
+                username=sanitized_username,
+                email=sanitized_email,
+                verification_link=verification_link,
+                support_email=support_email,
+                server_address=server_address,
+            )
+            html_body = RESEND_VERIFICATION_EMAIL_TEMPLATE.render(
+                username=sanitized_username,
+                email=sanitized_email,
+                verification_link=verification_link,
+                support_email=support_email,
+                server_address=server_address,
             )
-
-            # HTML body (unchanged, keeping your styling)
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Inspirahub Email Verification</title>
-            </head>
-            <body style="font-family: 'Helvetica Neue', Arial, sans-serif; color: #333333; background-color: #ebf8ff; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 12px; box-shadow: 0 4px 16px rgba(0,0,0,0.1); overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #3182ce, #2b6cb0); color: #ffffff; padding: 25px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 28px; font-weight: 600;">Inspirahub</h1>
-                        <p style="margin: 8px 0 0; font-size: 16px; opacity: 0.9;">Email Verification</p>
-                    </div>
-                    <div style="padding: 30px;">
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">Dear {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            Thank you for registering with Inspirahub! Please verify your email address associated with <strong>{sanitized_email}</strong> to activate your account.
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            Click the button below to verify your email. This link will expire in <strong>10 minutes</strong>.
-                        </p>
-                        <div style="text-align: center; margin: 20px 0;">
-                            <a href="{verification_link}" style="display: inline-block; padding: 12px 24px; background-color: #2b6cb0; color: #ffffff; text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: 500;">
-                                Verify Your Email
-                            </a>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            Alternatively, you can copy and paste this link into your browser: 
-                            <a href="{verification_link}" style="color: #2b6cb0; text-decoration: none; font-weight: 500;">{verification_link}</a>
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            If you did not request this verification, please ignore this email or contact our support team at 
-                            <a href="mailto:{support_email}" style="color: #2b6cb0; text-decoration: none; font-weight: 500;">{support_email}</a>.
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0;">Best regards,</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 5px 0 0;">The Inspirahub Team</p>
-                    </div>
-                    <div style="background-color: #bee3f8; padding: 15px; text-align: center; font-size: 12px; color: #2a4365;">
-                        <p style="margin: 0;">Inspirahub - Connecting Communities</p>
-                        <p style="margin: 5px 0 0;">
-                            <a href="{server_address}" style="color: #2b6cb0; text-decoration: none;">www.inspirahub.com</a> | 
-                            <a href="mailto:{support_email}" style="color: #2b6cb0; text-decoration: none;">Contact Support</a>
-                        </p>
-                        <p style="margin: 5px 0 0; opacity: 0.7;">
-                            This message was sent to {sanitized_email} in response to your email verification request.
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
 
             msg = Message(
                 email_subject,
@@ -1918,7 +2036,7 @@ def process_resend_verification_email(self, account_id, username, email, verific
             msg.body = email_body
             msg.html = html_body
             logger.debug(f"Attempting to send verification email to {sanitized_email}")
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent verification email to: {sanitized_email}")
 
         except smtplib.SMTPAuthenticationError as e:
@@ -1939,6 +2057,43 @@ def process_resend_verification_email(self, account_id, username, email, verific
 
 from datetime import datetime, timedelta, timezone  # Ensure timezone is imported
 
+# Account rows looked up by email (resend verification, password reset) are cached
+# briefly in Redis; every write to an account's email, verification flag or
+# password, and account deletion, drops the entries for the old and new email
+ACCOUNT_CACHE_SECONDS = 120
+
+
+def account_cache_key(email):
+    return f"acct:{hashlib.blake2b(email.encode(), digest_size=8).hexdigest()}"
+
+
+def drop_cached_accounts(*emails):
+    keys = [account_cache_key(email) for email in emails if email]
+    if keys:
+        drop_cached(*keys)
+
+
+def get_account_by_email(email):
+    key = account_cache_key(email)
+    try:
+        cached = redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning("Account cache unavailable, reading from the database: %s", e)
+        cached = None
+    if cached:
+        return tuple(json.loads(cached))
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_prepared(cursor, "account_by_email", (email,))
+            account = cursor.fetchone()
+    if account:
+        try:
+            redis_client.setex(key, ACCOUNT_CACHE_SECONDS, json.dumps(account))
+        except redis.RedisError as e:
+            logger.warning("Could not cache account row: %s", e)
+    return account
+
+
 @app.route("/resend_verification", methods=["GET", "POST"])
 def resend_verification():
     if request.method == "POST":
@@ -1949,44 +2104,30 @@ def resend_verification():
             return redirect(url_for("resend_verification"))
 
         try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT id, username, email, user_verified FROM accounts WHERE email = %s", (email,))
-                    user = cursor.fetchone()
+            user = get_account_by_email(email)
+            if not user:
+                logger.debug(f"No user found for email: {email}")
+                flash("No user associated with the provided email address. Please enter a valid email.", "error")
+                return redirect(url_for("resend_verification"))
 
-                    if not user:
-                        logger.debug(f"No user found for email: {email}")
-                        flash("No user associated with the provided email address. Please enter a valid email.", "error")
-                        return redirect(url_for("resend_verification"))
-
-                    account_id, username, current_email, user_verified = user
-                    if user_verified:
-                        logger.debug(f"Email {email} already verified for account_id: {account_id}")
-                        return render_template("auth/email_already_verified.html")
+            account_id, username, current_email, user_verified = user
+            if user_verified:
+                logger.debug(f"Email {email} already verified for account_id: {account_id}")
+                return render_template("auth/email_already_verified.html")
 
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
                     # Generate verification token using secrets
                     verification_token = generate_verification_token(length=32)  # Use existing function
                     verification_sent_time = datetime.now(timezone.utc)  # Use UTC
                     verification_token_expiration = verification_sent_time + timedelta(minutes=10)
 
-                    # Check for existing token
-                    cursor.execute("SELECT id FROM tokens WHERE account_id = %s", (account_id,))
-                    token = cursor.fetchone()
-
-                    if token:
-                        # Update existing token
-                        cursor.execute(
-                            "UPDATE tokens SET verification_token = %s, verification_sent_time = %s, "
-                            "verification_token_expiration = %s WHERE account_id = %s",
-                            (verification_token, verification_sent_time, verification_token_expiration, account_id),
-                        )
-                    else:
-                        # Insert new token
-                        cursor.execute(
-                            "INSERT INTO tokens (account_id, username, email, verification_token, "
-                            "verification_sent_time, verification_token_expiration) VALUES (%s, %s, %s, %s, %s, %s)",
-                            (account_id, username, email, verification_token, verification_sent_time, verification_token_expiration),
-                        )
+                    # Insert the token, or replace the account's existing one, in one statement
+                    execute_prepared(
+                        cursor,
+                        "upsert_verification_token",
+                        (account_id, username, email, verification_token, verification_sent_time, verification_token_expiration),
+                    )
                     conn.commit()
                     logger.info(f"Stored verification token for account_id {account_id}, email: {email}")
 
@@ -2017,19 +2158,20 @@ def generate_reset_token(length=32):
     characters = string.ascii_letters + string.digits
     return "".join(secrets.choice(characters) for _ in range(length))
 
-@celery.task(bind=True, max_retries=3)
+@celery.task(bind=True, max_retries=3, rate_limit="60/m", acks_late=True)
 def process_reset_password_emails(self, account_id, username, email):
     with app.app_context():
         logger.debug(f"Task process_reset_password_emails started with task_id {self.request.id} for account_id: {account_id}")
         try:
             # Validate email format
-            if not re.match(EMAIL_REGEX, email):
+            if not EMAIL_REGEX.match(email):
                 logger.error(f"Invalid email format: {email}")
                 return
 
-            # Sanitize inputs
-            sanitized_username = bleach.clean(username, tags=[], strip=True)
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
+            # HTML contexts are escaped by the Jinja templates; the email already
+            # passed EMAIL_REGEX, so only whitespace needs trimming
+            sanitized_username = username.strip()
+            sanitized_email = email.strip()
 
             # Generate a unique reset token
             reset_token = generate_reset_token()  # Use secrets-based token
@@ -2040,7 +2182,10 @@ def process_reset_password_emails(self, account_id, username, email):
                 with conn.cursor() as cursor:
                     cursor.execute(
                         "INSERT INTO reset_tokens (account_id, username, email, reset_password_token, reset_password_token_expiration) "
-                        "VALUES (%s, %s, %s, %s, %s)",
+                        "VALUES (%s, %s, %s, %s, %s) "
+                        "ON CONFLICT (account_id) DO UPDATE SET reset_password_token = EXCLUDED.reset_password_token, "
+                        "reset_password_token_expiration = EXCLUDED.reset_password_token_expiration, "
+                        "created_at = CURRENT_TIMESTAMP",
                         (account_id, sanitized_username, sanitized_email, reset_token, expiration_time)
                     )
                     conn.commit()
@@ -2051,66 +2196,19 @@ def process_reset_password_emails(self, account_id, username, email):
             support_email = "support@inspirahub.com"
             email_subject = "Inspirahub: Password Reset Request"
 
-            # Plain-text body
-            email_body = (
-                f"Dear {sanitized_username},\n\n"
-                f"You have requested a password reset for your Inspirahub account associated with {sanitized_email}.\n"
-                f"Please click the following link to reset your password: {reset_link}\n\n"
-                f"This link will expire in 1 hour. If you did not request a password reset, please contact our support team immediately at {support_email}.\n\n"
-                f"Best regards,\n"
-                f"The Inspirahub Team\n"
-                f"Inspirahub - Connecting Communities\n"
-                f"http://localhost:5000"
+            # Plain-text and HTML bodies
+            email_body = RESET_PASSWORD_EMAIL_TEXT.render(
+                username=sanitized_username,
+                email=sanitized_email,
+                reset_link=reset_link,
+                support_email=support_email,
+            )
+            html_body = RESET_PASSWORD_EMAIL_TEMPLATE.render(
+                username=sanitized_username,
+                email=sanitized_email,
+                reset_link=reset_link,
+                support_email=support_email,
             )
-
-            # HTML body
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Inspirahub Password Reset</title>
-            </head>
-            <body style="font-family: 'Helvetica Neue', Arial, sans-serif; color: #333333; background-color: #fff5f5; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 12px; box-shadow: 0 4px 16px rgba(0,0,0,0.1); overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #ed8936, #dd6b20); color: #ffffff; padding: 25px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 28px; font-weight: 600;">Inspirahub</h1>
-                        <p style="margin: 8px 0 0; font-size: 16px; opacity: 0.9;">Password Reset Request</p>
-                    </div>
-                    <div style="padding: 30px;">
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">Dear {sanitized_username},</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            You have requested a password reset for your Inspirahub account associated with <strong>{sanitized_email}</strong>.
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            Please click the button below to reset your password. This link will expire in <strong>1 hour</strong>.
-                        </p>
-                        <div style="text-align: center; margin: 20px 0;">
-                            <a href="{reset_link}" style="display: inline-block; padding: 12px 24px; background-color: #dd6b20; color: #ffffff; text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: 500;">
-                                Reset Your Password
-                            </a>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            If you did not request a password reset, please contact our support team immediately at 
-                            <a href="mailto:{support_email}" style="color: #dd6b20; text-decoration: none; font-weight: 500;">{support_email}</a>.
-                        </p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0;">Best regards,</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 5px 0 0;">The Inspirahub Team</p>
-                    </div>
-                    <div style="background-color: #feebc8; padding: 15px; text-align: center; font-size: 12px; color: #7b341e;">
-                        <p style="margin: 0;">Inspirahub - Connecting Communities</p>
-                        <p style="margin: 5px 0 0;">
-                            <a href="http://localhost:5000" style="color: #dd6b20; text-decoration: none;">www.inspirahub.com</a> | 
-                            <a href="mailto:{support_email}" style="color: #dd6b20; text-decoration: none;">Contact Support</a>
-                        </p>
-                        <p style="margin: 5px 0 0; opacity: 0.7;">
-                            This message was sent to {sanitized_email} in response to your password reset request.
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
 
             # Create and send the email
             msg = Message(
@@ -2122,7 +2220,7 @@ def process_reset_password_emails(self, account_id, username, email):
             msg.body = email_body
             msg.html = html_body
             logger.debug(f"Attempting to send reset email to {sanitized_email}")
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent password reset email to: {sanitized_email}")
 
         except smtplib.SMTPException as e:
@@ -2136,22 +2234,23 @@ def process_reset_password_emails(self, account_id, username, email):
             self.retry(countdown=60, exc=e)
 
 
-@celery.task(bind=True, max_retries=3)
+@celery.task(bind=True, max_retries=3, rate_limit="60/m", acks_late=True)
 def process_reset_password_success(self, account_id, email, new_password, token):
     with app.app_context():
         logger.debug(f"Task process_reset_password_success started with task_id {self.request.id} for account_id: {account_id}")
         try:
             # Validate email format
-            if not re.match(EMAIL_REGEX, email):
+            if not EMAIL_REGEX.match(email):
                 logger.error(f"Invalid email format: {email}")
                 return
 
-            # Sanitize inputs
-            sanitized_email = bleach.clean(email, tags=[], strip=True)
-            sanitized_token = bleach.clean(token, tags=[], strip=True)
+            # HTML contexts are escaped by the Jinja templates; the email already
+            # passed EMAIL_REGEX, so only whitespace needs trimming
+            sanitized_email = email.strip()
+            sanitized_token = token.strip()
 
             # Hash the new password
-            hashed_password = generate_password_hash(new_password, method="pbkdf2:sha256", salt_length=8)
+            hashed_password = hash_password(new_password)
 
             # Update the password and clear the reset token
             with get_db_connection() as conn:
@@ -2167,63 +2266,40 @@ def process_reset_password_success(self, account_id, email, new_password, token)
                         (token,)
                     )
                     conn.commit()
+                    drop_cached_accounts(email)
                     logger.debug(f"Updated password and cleared reset token for account_id: {account_id}")
 
+            # The confirmation goes out from the gevent email pool; a failed send is
+            # retried there without hashing the password again
+            send_reset_password_success_email.delay(sanitized_email, sanitized_token)
+
+        except psycopg2.Error as e:
+            logger.error(f"Database error in process_reset_password_success: {str(e)}", exc_info=True)
+            self.retry(countdown=60, exc=e)
+        except Exception as e:
+            logger.error(f"Unexpected error in process_reset_password_success: {str(e)}", exc_info=True)
+            self.retry(countdown=60, exc=e)
+
+
+@celery.task(bind=True, max_retries=3, rate_limit="60/m", acks_late=True)
+def send_reset_password_success_email(self, sanitized_email, sanitized_token):
+    with app.app_context():
+        try:
             # Send confirmation email
             support_email = "support@inspirahub.com"
             email_subject = "Inspirahub: Password Reset Confirmation"
 
-            # Plain-text body
-            email_body = (
-                f"Dear Inspirahub User,\n\n"
-                f"Your password for your Inspirahub account associated with {sanitized_email} has been successfully reset.\n"
-                f"Reset Token Used: {sanitized_token}\n\n"
-                f"You can now log in with your new password. If you did not initiate this change, please contact our support team immediately at {support_email}.\n\n"
-                f"Best regards,\n"
-                f"The Inspirahub Team\n"
-                f"Inspirahub - Connecting Communities\n"
-                f"http://192.168.21.96:5000"
+            # Plain-text and HTML bodies
+            email_body = RESET_PASSWORD_SUCCESS_EMAIL_TEXT.render(
+                email=sanitized_email,
+                token=sanitized_token,
+                support_email=support_email,
+            )
+            html_body = RESET_PASSWORD_SUCCESS_EMAIL_TEMPLATE.render(
+                email=sanitized_email,
+                token=sanitized_token,
+                support_email=support_email,
             )
-
-            # HTML body with celebratory styling
-            html_body = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <title>Inspirahub Password Reset Confirmation</title>
-            </head>
-            <body style="font-family: 'Helvetica Neue', Arial, sans-serif; color: #333333; background-color: #f0fff4; padding: 20px; margin: 0;">
-                <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 12px; box-shadow: 0 4px 16px rgba(0,0,0,0.1); overflow: hidden;">
-                    <div style="background: linear-gradient(90deg, #38a169, #2f855a); color: #ffffff; padding: 25px; text-align: center;">
-                        <h1 style="margin: 0; font-size: 28px; font-weight: 600;">Inspirahub</h1>
-                        <p style="margin: 8px 0 0; font-size: 16px; opacity: 0.9;">Password Reset Confirmation</p>
-                    </div>
-                    <div style="padding: 30px;">
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">Dear Inspirahub User,</p>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            Your password for your Inspirahub account associated with <strong>{sanitized_email}</strong> has been successfully reset.
-                        </p>
-                        <div style="margin: 20px 0; padding: 15px; background-color: #f0fff4; border: 1px solid #c6f6d5; border-radius: 8px;">
-                            <p style="font-size: 16px; line-height: 1.5; margin: 0; font-weight: 500;">Reset Token Used:</p>
-                            <p style="font-size: 18px; font-weight: 700; color: #2f855a; margin: 5px 0 0;">{sanitized_token}</p>
-                        </div>
-                        <p style="font-size: 16px; line-height: 1.6; margin: 0 0 16px;">
-                            You can now log in with your new password. If you did not initiate this change, please contact our support team immediately at 
-                            <a href="mailto:{support_email}" style="color: #2f855a; text-decoration: none; font-weight: 500;">{support_email}</a>.
-                        </p>
-                        <div style="text-align: center; margin: 20px 0;">
-                            <a href="https://www.inspirahub.com/login" style="display: inline-block; padding: 12px 24px; background-color: #2f855a | 
-                            <a href="mailto:{support_email}" style="color: #2f855a; text-decoration: none;">Contact Support</a>
-                        </p>
-                        <p style="margin: 5px 0 0; opacity: 0.7;">
-                            This message was sent to {sanitized_email} in response to your password reset request.
-                        </p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
 
             # Create and send the email
             msg = Message(
@@ -2235,17 +2311,14 @@ def process_reset_password_success(self, account_id, email, new_password, token)
             msg.body = email_body
             msg.html = html_body
             logger.debug(f"Attempting to send confirmation email to {sanitized_email}")
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent password reset confirmation email to: {sanitized_email}")
 
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error in process_reset_password_success: {str(e)}", exc_info=True)
-            self.retry(countdown=60, exc=e)
-        except psycopg2.Error as e:
-            logger.error(f"Database error in process_reset_password_success: {str(e)}", exc_info=True)
+            logger.error(f"SMTP error in send_reset_password_success_email: {str(e)}", exc_info=True)
             self.retry(countdown=60, exc=e)
         except Exception as e:
-            logger.error(f"Unexpected error in process_reset_password_success: {str(e)}", exc_info=True)
+            logger.error(f"Unexpected error in send_reset_password_success_email: {str(e)}", exc_info=True)
             self.retry(countdown=60, exc=e)
 
 
@@ -2255,39 +2328,32 @@ def reset_password():
     if request.method == "POST":
         email = request.form["email"]
         try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT id, username, user_verified FROM accounts WHERE email = %s", (email,))
-                    user = cursor.fetchone()
-                    if user:
-                        account_id, username, user_verified = user
-                        if not user_verified:
-                            logger.debug(f"Unverified account for email: {email}")
-                            flash(
-                                "Your account is not verified. Please verify your account to reset your password.",
-                                "error"
-                            )
-                            return redirect(url_for("reset_password"))
-                        process_reset_password_emails.delay(account_id, username, email)
-                        logger.info(f"Queued reset password task for email: {email}, account_id: {account_id}")
-                        flash(
-                            "Password reset instructions have been sent to your email. Reset and log in again",
-                            "success"
-                        )
-                        return redirect(url_for("login"))
-                    else:
-                        logger.debug(f"No user found for email: {email}")
-                        return render_template("auth/email_not_found.html")
+            user = get_account_by_email(email)
+            if user:
+                account_id, username, _, user_verified = user
+                if not user_verified:
+                    logger.debug(f"Unverified account for email: {email}")
+                    flash(
+                        "Your account is not verified. Please verify your account to reset your password.",
+                        "error"
+                    )
+                    return redirect(url_for("reset_password"))
+                process_reset_password_emails.delay(account_id, username, email)
+                logger.info(f"Queued reset password task for email: {email}, account_id: {account_id}")
+                flash(
+                    "Password reset instructions have been sent to your email. Reset and log in again",
+                    "success"
+                )
+                return redirect(url_for("login"))
+            else:
+                logger.debug(f"No user found for email: {email}")
+                return render_template("auth/email_not_found.html")
         except psycopg2.Error as e:
             logger.error(f"Database error in reset_password: {str(e)}", exc_info=True)
-            if 'conn' in locals():
-                conn.rollback()
             flash("A database error occurred. Please try again.", "error")
             return redirect(url_for("reset_password"))
         except Exception as e:
             logger.error(f"Unexpected error in reset_password: {str(e)}", exc_info=True)
-            if 'conn' in locals():
-                conn.rollback()
             flash("An unexpected error occurred. Please try again.", "error")
             return redirect(url_for("reset_password"))
     return render_template("auth/reset_password_request.html")
@@ -2357,7 +2423,7 @@ def get_current_email(user_id):
                 current_email = cursor.fetchone()
                 if current_email:
                     email = current_email[0]
-                    if not re.match(EMAIL_REGEX, email):
+                    if not EMAIL_REGEX.match(email):
                         logger.error(f"Invalid email format in database for user_id {user_id}: {email}")
                         return None
                     logger.debug(f"Retrieved current email for user_id {user_id}: {email}")
@@ -2368,7 +2434,7 @@ def get_current_email(user_id):
         return None
 
 def email_exists(email):
-    if not re.match(EMAIL_REGEX, email):
+    if not EMAIL_REGEX.match(email):
         logger.error(f"Invalid email format in email_exists: {email}")
         return False
     try:
@@ -2489,7 +2555,7 @@ def process_email_update_emails(self, user_id, username, old_email, new_email, v
             msg.body = email_verification_body
             msg.html = email_verification_html
             logger.debug(f"Attempting to send verification email to {sanitized_new_email}")
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent verification email to: {sanitized_new_email}")
 
             # Send notification email to old email with masked new email
@@ -2557,7 +2623,7 @@ def process_email_update_emails(self, user_id, username, old_email, new_email, v
             msg.body = notification_body
             msg.html = notification_html
             logger.debug(f"Attempting to send notification email to {sanitized_old_email}")
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent update notification to: {sanitized_old_email}")
 
         except smtplib.SMTPAuthenticationError as e:
@@ -2584,10 +2650,10 @@ def process_email_verification_emails(self, user_id, username, old_email, new_em
             logger.info(f"Starting email verification task for user_id: {user_id}, new_email: {new_email}, old_email: {old_email}, task_id: {self.request.id}")
             
             # Validate email formats
-            if not re.match(EMAIL_REGEX, new_email):
+            if not EMAIL_REGEX.match(new_email):
                 logger.error(f"Invalid new_email format: {new_email}")
                 return
-            if not re.match(EMAIL_REGEX, old_email):
+            if not EMAIL_REGEX.match(old_email):
                 logger.error(f"Invalid old_email format: {old_email}")
                 return
 
@@ -2673,7 +2739,7 @@ def process_email_verification_emails(self, user_id, username, old_email, new_em
             msg.body = confirmation_body
             msg.html = confirmation_html
             logger.debug(f"Attempting to send confirmation email to {sanitized_new_email}")
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent verification confirmation to: {sanitized_new_email}")
 
             # Send final notification to old email (if different) with masked new email
@@ -2746,7 +2812,7 @@ def process_email_verification_emails(self, user_id, username, old_email, new_em
                 msg.body = final_notification_body
                 msg.html = final_notification_html
                 logger.debug(f"Attempting to send final notification to {sanitized_old_email}")
-                mail.send(msg)
+                send_email(msg)
                 logger.info(f"Sent final update notification to: {sanitized_old_email}")
             else:
                 logger.info(f"Old email same as new email ({sanitized_old_email}), skipping final notification")
@@ -2820,7 +2886,7 @@ def update_email():
             return redirect(url_for("update_email"))
 
         # Check if new email is valid and not in use
-        if not re.match(EMAIL_REGEX, sanitized_new_email):
+        if not EMAIL_REGEX.match(sanitized_new_email):
             logger.warning(f"Invalid new email format: {sanitized_new_email}")
             flash("Invalid new email format.", "error")
             return redirect(url_for("update_email"))
@@ -2836,12 +2902,15 @@ def update_email():
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Delete existing tokens for this user
-                    cursor.execute("DELETE FROM tokens WHERE account_id = %s", (user_id,))
-                    # Store new token
+                    # Store the new token, replacing any existing one for this user
                     cursor.execute(
                         "INSERT INTO tokens (account_id, username, email, verification_token, verification_sent_time, "
-                        "verification_token_expiration) VALUES (%s, %s, %s, %s, %s, %s)",
+                        "verification_token_expiration) VALUES (%s, %s, %s, %s, %s, %s) "
+                        "ON CONFLICT (account_id) DO UPDATE SET username = EXCLUDED.username, email = EXCLUDED.email, "
+                        "verification_token = EXCLUDED.verification_token, "
+                        "verification_sent_time = EXCLUDED.verification_sent_time, "
+                        "verification_token_expiration = EXCLUDED.verification_token_expiration, "
+                        "reset_password_token = NULL, reset_password_token_expiration = NULL",
                         (user_id, sanitized_username, sanitized_new_email, verification_token, verification_sent_time, verification_token_expiration),
                     )
                     # Set user_verified to False
@@ -2851,6 +2920,7 @@ def update_email():
                     )
                     conn.commit()
                     logger.info(f"Stored verification token and set user_verified=False for user_id {user_id}")
+            drop_cached_accounts(old_email)
         except psycopg2.Error as e:
             logger.error(f"Database error in update_email for user_id {user_id}: {str(e)}", exc_info=True)
             if 'conn' in locals():
@@ -2937,6 +3007,8 @@ def verify_new_email(token):
                     cursor.execute("DELETE FROM tokens WHERE verification_token = %s", (sanitized_token,))
                     conn.commit()
                     logger.info(f"Updated email to {sanitized_new_email} and verified for user_id {account_id}")
+            drop_cached(profile_cache_key(account_id))
+            drop_cached_accounts(old_email, sanitized_new_email)
         except psycopg2.Error as e:
             logger.error(f"Database error updating email for user_id {account_id}: {str(e)}", exc_info=True)
             if 'conn' in locals():
@@ -3047,19 +3119,7 @@ def uploaded_file(filename):
 
 # Function to check password strength (matching register route requirements)
 def is_strong_password(password):
-    if len(password) < 12:
-        return False
-    if not re.search(r"[A-Z]", password):
-        return False
-    if not re.search(r"[a-z]", password):
-        return False
-    if not re.search(r"[0-9]", password):
-        return False
-    if len(re.findall(r'[!@#$%^&*(),.?":{}|<>]', password)) < 2:
-        return False
-    if re.search(r'(.)\1{2,}', password):
-        return False
-    return True
+    return validate_password(password)[0]
 
 # Celery task for sending password change email
 @celery.task(bind=True, ignore_result=True, max_retries=3, retry_backoff=True)
@@ -3084,7 +3144,7 @@ def send_password_change_email_task(self, email, username):
             msg = Message(subject, sender_email=sender_email, recipients=recipients)
             msg.body = message_body
 
-            mail.send(msg)
+            send_email(msg)
             current_app.logger.info(f"Password change email sent to {email}")
         except Exception as e:
             current_app.logger.error(f"Failed to send email to {email}: {str(e)}")
@@ -3118,13 +3178,11 @@ def change_password():
                 stored_password, user_email = result[0], result[1]
 
                 # Verify the current password provided by the user
-                if check_password_hash(stored_password, current_password):
+                if verify_password(stored_password, current_password):
                     # Check if the new password meets the strength requirements
                     if is_strong_password(new_password):
                         # Hash the new password before updating it in the database
-                        hashed_password = generate_password_hash(
-                            new_password, method="pbkdf2:sha256", salt_length=8
-                        )
+                        hashed_password = hash_password(new_password)
 
                         # Update the user's password in the database
                         cursor.execute(
@@ -3134,6 +3192,7 @@ def change_password():
 
                         # Commit the changes to the database
                         conn.commit()
+                        drop_cached_accounts(user_email)
 
                         # Clear all session data (log out user from all sessions)
                         session.clear()
@@ -3158,9 +3217,8 @@ def change_password():
 
             return render_template("account/change_password.html")
         finally:
-            # Ensure cursor and connection are closed
+            # Close the cursor; the pooled connection is released on teardown
             cursor.close()
-            conn.close()
     else:
         flash("You are not logged in. Please log in to change your password.", "error")
         return redirect(url_for("login"))
@@ -3236,7 +3294,7 @@ def process_tfa_update(self, email, status, username):
             logger.info(f"Starting TFA update task for user: {sanitized_email}, status: {sanitized_status}")
 
             # Validate email format
-            if not re.match(EMAIL_REGEX, sanitized_email):
+            if not EMAIL_REGEX.match(sanitized_email):
                 logger.error(f"Invalid email format: {sanitized_email}")
                 return
 
@@ -3392,7 +3450,7 @@ def process_tfa_update(self, email, status, username):
             )
             msg.body = plain_text_body
             msg.html = html_body
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Sent TFA {sanitized_status} email to: {sanitized_email}")
 
         except smtplib.SMTPAuthenticationError as e:
@@ -3495,7 +3553,7 @@ def is_valid_password(email, password):
                     "SELECT password FROM accounts WHERE email = %s", (email,)
                 )
                 stored_password = cursor.fetchone()
-        return stored_password and check_password_hash(stored_password[0], password)
+        return stored_password and verify_password(stored_password[0], password)
     except Exception as e:
         app.logger.error(f"Error validating password: {str(e)}")
         return False
@@ -3597,7 +3655,7 @@ def send_account_deletion_confirmation_non_tfa_email_task(self, email, username)
             )
             msg.body = plain_text_body
             msg.html = html_body
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Non-TFA account deletion confirmation email sent to {sanitized_email}")
         except smtplib.SMTPAuthenticationError as e:
             logger.error(f"SMTP authentication error for {sanitized_email}: {str(e)}", exc_info=True)
@@ -3704,7 +3762,7 @@ def send_tfa_deletion_token_email_task(self, email, token, username):
             )
             msg.body = plain_text_body
             msg.html = html_body
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"TFA deletion token email sent to {sanitized_email}")
         except smtplib.SMTPAuthenticationError as e:
             logger.error(f"SMTP authentication error for {sanitized_email}: {str(e)}", exc_info=True)
@@ -3809,7 +3867,7 @@ def send_account_deletion_confirmation_email_task(self, email, username, token=N
             )
             msg.body = plain_text_body
             msg.html = html_body
-            mail.send(msg)
+            send_email(msg)
             logger.info(f"Account deletion confirmation email sent to {sanitized_email}")
         except smtplib.SMTPAuthenticationError as e:
             logger.error(f"SMTP authentication error for {sanitized_email}: {str(e)}", exc_info=True)
@@ -3902,13 +3960,17 @@ def delete_account():
                 with conn.cursor() as cursor:
                     cursor.execute(
                         "INSERT INTO deleted_accounts (email, username, first_name, last_name, country, day, month, year, deleted_date, deletion_reason) "
-                        "SELECT email, username, first_name, last_name, country, day, month, year, %s, %s FROM accounts WHERE id = %s",
+                        "SELECT email, username, first_name, last_name, country, "
+                        "EXTRACT(DAY FROM registration_date)::int, EXTRACT(MONTH FROM registration_date)::int, "
+                        "EXTRACT(YEAR FROM registration_date)::int, %s, %s FROM accounts WHERE id = %s",
                         (deletion_date, deletion_reason, user_id),
                     )
                     cursor.execute(
                         "DELETE FROM accounts WHERE id = %s", (user_id,)
                     )
                     conn.commit()
+            drop_cached(profile_cache_key(user_id))
+            drop_cached_accounts(stored_email)
 
             send_account_deletion_confirmation_non_tfa_email_task.delay(stored_email, stored_username)
             session.clear()
@@ -3941,13 +4003,17 @@ def verify_tfa_deletion():
             with conn.cursor() as cursor:
                 cursor.execute(
                     "INSERT INTO deleted_accounts (email, username, first_name, last_name, country, day, month, year, deleted_date, deletion_reason) "
-                    "SELECT email, username, first_name, last_name, country, day, month, year, %s, %s FROM accounts WHERE id = %s",
+                    "SELECT email, username, first_name, last_name, country, "
+                    "EXTRACT(DAY FROM registration_date)::int, EXTRACT(MONTH FROM registration_date)::int, "
+                    "EXTRACT(YEAR FROM registration_date)::int, %s, %s FROM accounts WHERE id = %s",
                     (deletion_date, deletion_reason, user_id),
                 )
                 cursor.execute(
                     "DELETE FROM accounts WHERE id = %s", (user_id,)
                 )
                 conn.commit()
+        drop_cached(profile_cache_key(user_id))
+        drop_cached_accounts(user_email)
 
         # Pass the verification token to the email task
         send_account_deletion_confirmation_email_task.delay(user_email, username, stored_token)
@@ -3966,7 +4032,7 @@ def send_contact_emails(self, name, email, message, subject):
             logger.info(f"Starting contact email task for {email} with task_id {self.request.id}")
             
             # Validate email format
-            if not re.match(EMAIL_REGEX, email):
+            if not EMAIL_REGEX.match(email):
                 logger.error(f"Invalid email format: {email}")
                 return
             
@@ -3995,7 +4061,7 @@ def send_contact_emails(self, name, email, message, subject):
             support_msg.body = support_body
             
             logger.debug(f"Sending support email to {support_email}")
-            mail.send(support_msg)
+            send_email(support_msg)
             logger.info(f"Support email sent to {support_email} from {sanitized_email}")
             
             # Auto-reply to user
@@ -4082,7 +4148,7 @@ def send_contact_emails(self, name, email, message, subject):
             reply_msg.html = html_body
             
             logger.debug(f"Sending auto-reply email to {sanitized_email}")
-            mail.send(reply_msg)
+            send_email(reply_msg)
             logger.info(f"Auto-reply email sent to {sanitized_email}")
         
         except smtplib.SMTPAuthenticationError as e:
@@ -4113,7 +4179,7 @@ def contact():
                 flash("All fields are required.", "error")
                 return redirect(url_for("contact"))
             
-            if not re.match(EMAIL_REGEX, email):
+            if not EMAIL_REGEX.match(email):
                 flash("Invalid email format.", "error")
                 return redirect(url_for("contact"))
 
@@ -4791,7 +4857,7 @@ def follow_user(user_id):
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(
-                    "SELECT * FROM followers WHERE follower_id = %s AND following_id = %s",
+                    "SELECT 1 FROM followers WHERE follower_id = %s AND following_id = %s",
                     (follower_id, user_id),
                 )
                 existing_follow = cursor.fetchone()
@@ -4835,7 +4901,7 @@ def unfollow_user(user_id):
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(
-                    "SELECT * FROM followers WHERE follower_id = %s AND following_id = %s",
+                    "SELECT 1 FROM followers WHERE follower_id = %s AND following_id = %s",
                     (follower_id, user_id),
                 )
                 existing_relationship = cursor.fetchone()
@@ -4916,24 +4982,19 @@ def followers_profile(user_id):
                 if user_data:
                     username = user_data[0]
 
+                    # Check whether the logged-in user follows each follower in the same query
                     cursor.execute(
-                        "SELECT a.id, a.username FROM accounts a "
+                        "SELECT a.id, a.username, EXISTS ("
+                        "SELECT 1 FROM followers mf WHERE mf.follower_id = %s AND mf.following_id = a.id"
+                        ") FROM accounts a "
                         "JOIN followers f ON a.id = f.follower_id "
                         "WHERE f.following_id = %s",
-                        (user_id,),
+                        (session.get("user_id"), user_id),
                     )
                     followers_data = cursor.fetchall()
 
                     follower_usernames = []
-                    logged_in_user_id = session.get("user_id")
-                    for follower in followers_data:
-                        follower_id, follower_username = follower
-                        # Check if the logged-in user follows this follower
-                        cursor.execute(
-                            "SELECT COUNT(*) FROM followers WHERE follower_id = %s AND following_id = %s",
-                            (logged_in_user_id, follower_id),
-                        )
-                        is_following = cursor.fetchone()[0] > 0
+                    for follower_id, follower_username, is_following in followers_data:
                         follower_usernames.append({
                             "id": follower_id,
                             "username": follower_username,
@@ -5127,7 +5188,7 @@ def full_post(post_id):
                 is_following = False
                 if user_id:
                     cursor.execute(
-                        "SELECT * FROM followers WHERE follower_id = %s AND following_id = %s",
+                        "SELECT 1 FROM followers WHERE follower_id = %s AND following_id = %s",
                         (user_id, post_owner_id[0])
                     )
                     is_following = cursor.fetchone() is not None
@@ -5479,41 +5540,6 @@ def admin_delete_post(post_id):
         return redirect(url_for("admin_panel"))
 
 
-def admin_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if "user_id" not in session:
-            flash("You need to login first.", "error")
-            return redirect(url_for("login"))
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT role FROM accounts WHERE id = %s", (session["user_id"],))
-            result = cursor.fetchone()
-            cursor.close()
-
-            if result is None:
-                flash("User not found.", "error")
-                return redirect(url_for("login"))
-
-            user_role = result[0]
-            if user_role == "admin":
-                return f(*args, **kwargs)
-            else:
-                logger.warning(f"Unauthorized admin access attempt by user_id: {session['user_id']}")
-                flash("Access denied. You do not have permission to view this page.", "error")
-                return redirect(url_for("view_posts"))
-
-        except psycopg2.Error as e:
-            logger.error(f"Database error in admin_required: {e}", exc_info=True)
-            flash("A database error occurred. Please try again.", "error")
-            return redirect(url_for("view_posts"))
-
-    return decorated_function
-
-
-
 @app.route("/admin/dashboard", methods=["GET"])
 @admin_required
 def admin_dashboard():
@@ -5548,7 +5574,7 @@ def admin_create_user():
                     first_name,
                     last_name,
                     username,
-                    generate_password_hash(password),
+                    hash_password(password),
                     country,
                     role,
                     False,
@@ -5629,7 +5655,7 @@ def admin_login():
             user = cursor.fetchone()
             cursor.close()
 
-            if user and check_password_hash(user[2], password):
+            if user and verify_password(user[2], password):
                 if user[3] != "admin":
                     flash("Access denied. Admin privileges required.", "error")
                     return redirect(url_for("admin_login"))
@@ -5638,6 +5664,7 @@ def admin_login():
                 session["user_id"] = user[0]
                 session["username"] = user[1]
                 session["role"] = user[3]
+                session["role_checked_at"] = time.time()
                 logger.info(f"Admin {username} logged in")
                 return redirect(url_for("admin_dashboard"))
 
@@ -5714,10 +5741,12 @@ def admin_reset_password():
                 return redirect(url_for("admin_reset_password"))
 
             cursor.execute(
-                "UPDATE accounts SET password = %s WHERE id = %s",
-                (generate_password_hash(new_password), user_id)
+                "UPDATE accounts SET password = %s WHERE id = %s RETURNING email",
+                (hash_password(new_password), user_id)
             )
+            (reset_email,) = cursor.fetchone()
             conn.commit()
+            drop_cached_accounts(reset_email)
             cursor.close()
 
             logger.info(f"Admin {session.get('username')} reset password for user_id {user_id}")